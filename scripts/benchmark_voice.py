@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Benchmark the radio effect DSP in process_voice.py on synthetic clips.
+
+Runs offline on the CPU and reports, for each sample rate and clip length:
+- Throughput (clips/s and samples/s) and peak traced memory for the full
+  effect chain and for each stage alone
+- The float32 path's peak allocation and its difference from the float64
+  path, each against a limit
+
+Results can be saved as JSON and compared against an earlier run; the script
+exits with an error if the full effect chain got slower than the allowed
+threshold on average over all cases, and by more than the run-to-run spread
+of the timings.
+
+Usage:
+    python scripts/benchmark_voice.py
+    python scripts/benchmark_voice.py --output bench.json
+    python scripts/benchmark_voice.py --compare bench.json --threshold 0.2
+    python scripts/benchmark_voice.py --rates 44100 --durations 1 3 --clips 20
+"""
+
+import argparse
+import functools
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from process_voice import (
+    RADIO_PRESETS,
+    compress_and_attenuate,
+    get_filter_chain,
+    optimize_payload,
+    peak,
+    radio_effect,
+)
+
+SAMPLE_RATES = (16000, 22050, 44100, 48000)
+DURATIONS = (1.0, 3.0, 10.0)
+
+# Stages whose slowdown fails --compare. The single-stage cases are too short
+# to time reliably and are only reported.
+GATED_STAGES = ("full", "full_float32")
+
+# A change within this many times the run-to-run spread is treated as noise
+NOISE_BANDS = 3
+
+# --compare raises --repeat and --min-time to at least these, so the spread
+# it gates against is measured from enough runs
+COMPARE_MIN_REPEAT = 7
+COMPARE_MIN_TIME = 0.2
+
+
+def synthetic_clip(rng, sr, seconds):
+    """Noise shaped by a slow syllable-like envelope, roughly the level of a voice line."""
+    samples = int(sr * seconds)
+    t = np.arange(samples) / sr
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t)) * np.hanning(samples)
+    return 0.8 * envelope * rng.standard_normal(samples)
+
+
+def time_runs(fn, repeat, min_seconds):
+    """
+    Time fn like timeit's autorange: find a loop count whose total run takes
+    at least min_seconds, then time repeat runs of that many calls.
+
+    Returns: list with the wall time of one call in each run
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - start >= min_seconds:
+            break
+        loops *= 2
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        times.append((time.perf_counter() - start) / loops)
+    return times
+
+
+def relative_spread(times):
+    """Median absolute deviation of run times, as a fraction of their median."""
+    median = statistics.median(times)
+    return statistics.median(abs(t - median) for t in times) / median
+
+
+def run_clips(fn, clips):
+    """Run fn on every clip."""
+    for clip in clips:
+        fn(clip)
+
+
+def peak_allocation(fn):
+    """Run fn under tracemalloc and return the peak traced bytes."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def stage_functions(sr):
+    """
+    The effect chain and each of its stages as single-clip functions.
+
+    Returns: dict of stage name -> fn(audio)
+    """
+    params = RADIO_PRESETS["default"]
+    chain = get_filter_chain(sr, **params)
+
+    def normalize(audio):
+        return audio * (0.95 / max(peak(audio), 1e-9))
+
+    return {
+        "full": lambda audio: radio_effect(audio, sr, **params),
+        "full_float32": lambda audio: radio_effect(audio, sr, float32=True, **params),
+        "filter": chain.apply,
+        "compress": compress_and_attenuate,
+        "normalize": normalize,
+        "optimize": lambda audio: optimize_payload(audio, sr, -50, 16000),
+    }
+
+
+def run_suite(rng, rates, durations, clip_count, repeat, min_seconds):
+    """
+    Time every stage at every sample rate and clip length.
+
+    Returns: dict of case name ("stage@rate/seconds") -> result dict
+    """
+    results = {}
+
+    for sr in rates:
+        stages = stage_functions(sr)
+
+        for seconds in durations:
+            clips = [synthetic_clip(rng, sr, seconds) for _ in range(clip_count)]
+            samples = sum(len(clip) for clip in clips)
+
+            for stage, fn in stages.items():
+                run_all = functools.partial(run_clips, fn, clips)
+
+                # Warm up caches (filter design, scratch buffers) first
+                run_all()
+                times = time_runs(run_all, repeat, min_seconds)
+                elapsed = statistics.median(times)
+                spread = relative_spread(times)
+                peak_bytes = peak_allocation(functools.partial(fn, clips[0]))
+
+                case = f"{stage}@{sr}/{seconds:g}s"
+                results[case] = {
+                    "stage": stage,
+                    "sample_rate": sr,
+                    "seconds": seconds,
+                    "clips_per_sec": clip_count / elapsed,
+                    "best_clips_per_sec": clip_count / min(times),
+                    "spread": spread,
+                    "samples_per_sec": samples / elapsed,
+                    "peak_bytes": peak_bytes,
+                }
+
+                print(
+                    f"  {case:26s} {clip_count / elapsed:9.1f} clips/s"
+                    f"  {samples / elapsed / 1e6:7.2f} Msamples/s"
+                    f"  {peak_bytes / 1e6:7.2f} MB peak"
+                    f"  ±{spread:.1%}"
+                )
+
+    return results
+
+
+def check_float32_allocation(rng, sr, limit):
+    """
+    Check radio_effect's float32 path allocates at most limit times the input
+    size. The scratch buffer is warmed up first, since it is reused across
+    files in a real run.
+    """
+    audio = synthetic_clip(rng, sr, 10.0).astype(np.float32)
+    radio_effect(audio, sr, float32=True)
+
+    float32_peak = peak_allocation(lambda: radio_effect(audio, sr, float32=True))
+    audio64 = audio.astype(np.float64)
+    float64_peak = peak_allocation(lambda: radio_effect(audio64, sr))
+
+    print(f"Peak allocation for a 10 s clip ({audio.nbytes / 1e6:.1f} MB as float32):")
+    print(f"  float64 path: {float64_peak / audio.nbytes:5.2f}x float32 input")
+    print(f"  float32 path: {float32_peak / audio.nbytes:5.2f}x input")
+
+    if float32_peak > limit * audio.nbytes:
+        print(f"❌ float32 path allocates more than {limit:g}x its input")
+        return False
+
+    print(f"✓ float32 path stays within {limit:g}x its input")
+    return True
+
+
+def check_float32_accuracy(rng, rates, limit):
+    """
+    Check radio_effect's float32 output stays within limit 16-bit LSBs of the
+    float64 output at every sample rate.
+    """
+    ok = True
+
+    print("Max difference from the float64 path for a 10 s clip:")
+    for sr in rates:
+        audio = synthetic_clip(rng, sr, 10.0)
+        expected, _ = radio_effect(audio, sr)
+        actual, _ = radio_effect(audio.astype(np.float32), sr, float32=True)
+        lsb = np.abs(actual - expected).max() * 32768
+
+        marker = "  "
+        if lsb > limit:
+            marker = "❌"
+            ok = False
+        print(f"  {marker} {sr:6d} Hz: {lsb:5.2f} LSB at 16-bit")
+
+    if ok:
+        print(f"✓ float32 output stays within {limit:g} LSB of float64")
+    else:
+        print(f"❌ float32 output differs by more than {limit:g} LSB")
+    return ok
+
+
+def compare_results(baseline, results, threshold):
+    """
+    Compare throughput against a baseline run.
+
+    Each case is compared on its best run, which background load can only
+    slow down, and gets a noise band of NOISE_BANDS times the two runs'
+    combined spread. Single cases are too noisy to gate on, so a case that
+    slowed past both the threshold and its band is only marked. What fails
+    the run is a stage in GATED_STAGES whose geometric mean change over all
+    its cases is past the threshold and past the median of their bands.
+
+    Returns: list of (stage, geometric mean change, noise band) that got
+    slower than the threshold and the noise allow
+    """
+    ratios = {}
+    bands = {}
+
+    for case, result in sorted(results.items()):
+        if case not in baseline:
+            continue
+
+        # Results saved before best runs and spreads were recorded
+        before = baseline[case].get(
+            "best_clips_per_sec", baseline[case]["clips_per_sec"]
+        )
+        after = result["best_clips_per_sec"]
+        change = (after - before) / before
+        band = NOISE_BANDS * math.hypot(
+            baseline[case].get("spread", result["spread"]), result["spread"]
+        )
+        ratios.setdefault(result["stage"], []).append(after / before)
+        bands.setdefault(result["stage"], []).append(band)
+
+        marker = "⚠" if change < -max(threshold, band) else "  "
+        print(
+            f"  {marker} {case:26s} {before:9.1f} -> {after:9.1f} clips/s"
+            f" ({change:+.0%}, noise ±{band:.0%})"
+        )
+
+    regressions = []
+    print()
+    for stage in GATED_STAGES:
+        if stage not in ratios:
+            continue
+
+        change = statistics.geometric_mean(ratios[stage]) - 1
+        band = statistics.median(bands[stage])
+        marker = "  "
+        if change < -max(threshold, band):
+            marker = "❌"
+            regressions.append((stage, change, band))
+        print(
+            f"  {marker} {stage:26s} {change:+.0%} over {len(ratios[stage])} cases"
+            f" (noise ±{band:.0%})"
+        )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the radio effect DSP on synthetic clips"
+    )
+    parser.add_argument(
+        "--rates",
+        type=int,
+        nargs="+",
+        default=list(SAMPLE_RATES),
+        help="Sample rates to test (default: 16000 22050 44100 48000)",
+    )
+    parser.add_argument(
+        "--durations",
+        type=float,
+        nargs="+",
+        default=list(DURATIONS),
+        help="Clip lengths in seconds (default: 1 3 10)",
+    )
+    parser.add_argument(
+        "--clips", type=int, default=8, help="Clips per case (default: 8)"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Timed runs per case, the median is reported (default: 5, at least"
+        f" {COMPARE_MIN_REPEAT} with --compare)",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.1,
+        help="Minimum seconds per timed run, short cases are looped (default: 0.1,"
+        f" at least {COMPARE_MIN_TIME:g} with --compare)",
+    )
+    parser.add_argument(
+        "--alloc-limit",
+        type=float,
+        default=1.5,
+        help="Maximum float32 peak allocation as a multiple of input size (default: 1.5)",
+    )
+    parser.add_argument(
+        "--lsb-limit",
+        type=float,
+        default=2,
+        help="Maximum float32 vs float64 difference in 16-bit LSBs (default: 2)",
+    )
+    parser.add_argument("--output", help="Save results to this JSON file")
+    parser.add_argument(
+        "--compare", help="Compare against results saved by an earlier --output"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Fail if full-chain throughput drops by more than this fraction (default: 0.2)",
+    )
+    args = parser.parse_args()
+
+    if args.compare and (
+        args.repeat < COMPARE_MIN_REPEAT or args.min_time < COMPARE_MIN_TIME
+    ):
+        args.repeat = max(args.repeat, COMPARE_MIN_REPEAT)
+        args.min_time = max(args.min_time, COMPARE_MIN_TIME)
+        print(
+            f"⚠ --compare needs steadier timings, using --repeat {args.repeat}"
+            f" --min-time {args.min_time:g}\n"
+        )
+
+    rng = np.random.default_rng(0)
+    ok = True
+
+    print("=== Stage throughput ===")
+    results = run_suite(
+        rng, args.rates, args.durations, args.clips, args.repeat, args.min_time
+    )
+
+    print("\n=== float32 allocation ===")
+    if not check_float32_allocation(rng, args.rates[-1], args.alloc_limit):
+        ok = False
+
+    print("\n=== float32 accuracy ===")
+    if not check_float32_accuracy(rng, args.rates, args.lsb_limit):
+        ok = False
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+        print(f"\n=== Compared with {args.compare} ===")
+        regressions = compare_results(baseline, results, args.threshold)
+
+        if regressions:
+            print(
+                f"\n❌ {len(regressions)} stage(s) slowed down by more than"
+                f" {args.threshold:.0%} and their noise band"
+            )
+            ok = False
+        else:
+            print(
+                f"\n✓ Full effect chain didn't slow down by more than"
+                f" {args.threshold:.0%}"
+            )
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,21 @@
 #!/usr/bin/env python3
 """Find and delete unreferenced sound files in mod/sounds/voice/"""
 
-import re
 from pathlib import Path
 import sys
 
+from mod_graph import load_mod_graph
 
-def get_referenced_files():
-    """Get all voice files referenced in XML files"""
-    sounds_dir = Path("mod/sounds")
-    xml_files = list(sounds_dir.glob("gfl_voice_lines_*.xml"))
 
+def get_referenced_files(graph):
+    """Get all voice files referenced anywhere in the mod's XML"""
     referenced = set()
 
-    for xml_file in xml_files:
-        with open(xml_file, "r") as f:
-            content = f.read()
-
-        # Find all file paths in <Path name="..."> tags
-        paths = re.findall(r'<Path\s+name="data/sounds/voice/([^"]+)"', content)
-        referenced.update(paths)
+    for path in graph.names("asset"):
+        if path.startswith("data/sounds/voice/") and graph.referenced_by(
+            ("asset", path)
+        ):
+            referenced.add(path.removeprefix("data/sounds/voice/"))
 
     return referenced
 
@@ -40,7 +36,14 @@ def get_all_voice_files():
 def main():
     print("Finding unreferenced voice files...\n")
 
-    referenced = get_referenced_files()
+    graph = load_mod_graph(Path("mod"))
+
+    if graph.errors:
+        # Files only a broken XML references would look unused
+        print("Error: fix the XML files above before looking for unused sounds")
+        return 1
+
+    referenced = get_referenced_files(graph)
     all_files = get_all_voice_files()
 
     unreferenced = all_files - referenced
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Find byte-identical voice clips in mod/sounds/voice/, keep one canonical copy of
+each, point the mod's XML at it and delete the rest.
+
+Clips are compared by their audio format and PCM data only, so two exports of
+the same line with different metadata chunks still count as duplicates.
+"""
+
+import hashlib
+import struct
+import sys
+from pathlib import Path
+
+from cleanup_unused_sounds import get_referenced_files
+from mod_graph import load_mod_graph
+
+VOICE_DIR = Path("mod/sounds/voice")
+XML_PREFIX = "data/sounds/voice/"
+
+
+def pcm_digest(wav_file):
+    """
+    Hash a WAV file's format and PCM data, ignoring every other RIFF chunk.
+
+    Returns: hex digest, or None if the file isn't a readable WAV
+    """
+    digest = hashlib.sha256()
+    found_data = False
+
+    with open(wav_file, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:] != b"WAVE":
+            return None
+
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                break
+
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+
+            if chunk_id == b"fmt ":
+                # Format tag, channels, sample rate, byte rate, block align, bits
+                fmt = f.read(chunk_size)
+                digest.update(fmt[:16])
+            elif chunk_id == b"data":
+                remaining = chunk_size
+                while remaining:
+                    block = f.read(min(remaining, 1 << 20))
+                    if not block:
+                        break
+                    digest.update(block)
+                    remaining -= len(block)
+                found_data = True
+            else:
+                f.seek(chunk_size, 1)
+
+            # Chunks are padded to an even size
+            if chunk_size % 2:
+                f.seek(1, 1)
+
+    return digest.hexdigest() if found_data else None
+
+
+def find_duplicates(referenced):
+    """
+    Group voice files with identical audio. referenced is the set of files
+    the mod's XML uses, which are preferred as the canonical copy.
+
+    Returns: dict of canonical file -> list of duplicate files, all relative to
+    mod/sounds/voice/
+    """
+    by_digest = {}
+
+    for wav_file in sorted(VOICE_DIR.rglob("*.wav")):
+        digest = pcm_digest(wav_file)
+        if digest is None:
+            print(f"Warning: skipping unreadable WAV {wav_file}")
+            continue
+
+        rel_path = wav_file.relative_to(VOICE_DIR).as_posix()
+        by_digest.setdefault(digest, []).append(rel_path)
+
+    duplicates = {}
+
+    for files in by_digest.values():
+        if len(files) < 2:
+            continue
+
+        # Prefer a file the XML already uses, then the shortest name
+        files.sort(key=lambda path: (path not in referenced, len(path), path))
+        duplicates[files[0]] = files[1:]
+
+    return duplicates
+
+
+def rewrite_xml_references(graph, replacements):
+    """
+    Point every reference the mod graph found to a duplicate at its
+    canonical file, in whichever XML file it's in.
+
+    Returns: number of references rewritten
+    """
+    rewritten = 0
+    values = {
+        f"{XML_PREFIX}{duplicate}": f"{XML_PREFIX}{canonical}"
+        for duplicate, canonical in replacements.items()
+    }
+
+    for rel_path, xml_file in sorted(graph.files.items()):
+        updated, count = xml_file.replace_values(values)
+
+        if count:
+            xml_path = graph.mod_dir / rel_path
+            xml_path.write_bytes(updated)
+            rewritten += count
+            print(f"Updated: {xml_path}")
+
+    return rewritten
+
+
+def main():
+    print("Finding duplicate voice files...\n")
+
+    graph = load_mod_graph(Path("mod"))
+
+    if graph.errors:
+        # References in a broken XML file couldn't be rewritten
+        print("Error: fix the XML files above before deduplicating voice files")
+        return 1
+
+    duplicates = find_duplicates(get_referenced_files(graph))
+
+    if not duplicates:
+        print("✓ No duplicate voice files found!")
+        return 0
+
+    total_bytes = 0
+    total_files = 0
+
+    for canonical in sorted(duplicates):
+        print(f"{canonical}")
+        for duplicate in duplicates[canonical]:
+            size = (VOICE_DIR / duplicate).stat().st_size
+            total_bytes += size
+            total_files += 1
+            print(f"  = {duplicate} ({size / 1024:.1f} KB)")
+
+    print(
+        f"\nTotal: {total_files} duplicate files, "
+        f"{total_bytes / 1e6:.2f} MB can be saved"
+    )
+
+    # Ask for confirmation
+    response = input("\nDeduplicate these files? (yes/no): ").strip().lower()
+
+    if response != "yes":
+        print("\nCancelled - no files were changed")
+        return 1
+
+    replacements = {
+        duplicate: canonical
+        for canonical, files in duplicates.items()
+        for duplicate in files
+    }
+
+    rewritten = rewrite_xml_references(graph, replacements)
+
+    deleted_count = 0
+    for duplicate in sorted(replacements):
+        full_path = VOICE_DIR / duplicate
+        if full_path.exists():
+            full_path.unlink()
+            deleted_count += 1
+            print(f"Deleted: {duplicate}")
+
+    print(f"\n✓ Rewrote {rewritten} XML references")
+    print(
+        f"✓ Deleted {deleted_count} duplicate files, saved {total_bytes / 1e6:.2f} MB"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
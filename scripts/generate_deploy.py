@@ -14,24 +14,26 @@ Usage:
     python generate_deploy_screens.py
 """
 
-import re
-import xml.etree.ElementTree as ET
-from pathlib import Path
+import sys
 
+from mod_graph import load_mod_graph
 
-def extract_unit_data(unit_xml_path):
-    """Extract unit information including class count and colors."""
-    with open(unit_xml_path, "r", encoding="utf-8") as f:
-        content = f.read()
 
+def extract_unit_data(graph, unit_xml_path):
+    """Extract unit information including class count and colors."""
     units = []
 
-    unit_pattern = r'<Unit\s+name="(GFL-UNIT-[^"]+)"[^>]*flagColor="([^"]+)"[^>]*>.*?<Classes>(.*?)</Classes>'
-    matches = re.findall(unit_pattern, content, re.DOTALL)
+    for unit in graph.definitions(kind="unit", file=unit_xml_path):
+        unit_name = unit.key[1]
+        flag_color = unit.element.get("flagColor")
+        if not unit_name.startswith("GFL-UNIT-") or flag_color is None:
+            continue
 
-    for unit_name, flag_color, classes_block in matches:
-        class_pattern = r'<Class\s+name="(GFL-DOLL-[^"]+)"'
-        classes = re.findall(class_pattern, classes_block)
+        classes = [
+            doll_class.get("name")
+            for doll_class in unit.element.iterfind("Classes/Class")
+            if doll_class.get("name", "").startswith("GFL-DOLL-")
+        ]
 
         units.append(
             {
@@ -513,17 +515,19 @@ def generate_girl_deploy(units, output_path):
 
 
 def main():
-    script_dir = Path(__file__).parent
-    project_dir = script_dir.parent
+    graph = load_mod_graph()
+    if graph.errors:
+        # Generating from a half-parsed mod would drop definitions
+        sys.exit(1)
 
-    unit_file = project_dir / "mod" / "units" / "gfl_unit.xml"
-    deploy_output = project_dir / "mod" / "gui" / "gfl_deploy.xml"
-    deploy_girl_output = project_dir / "mod" / "gui" / "gfl_deploy_girl.xml"
+    unit_file = "units/gfl_unit.xml"
+    deploy_output = graph.mod_dir / "gui" / "gfl_deploy.xml"
+    deploy_girl_output = graph.mod_dir / "gui" / "gfl_deploy_girl.xml"
 
     print("=== Generating Deploy Screens ===\n")
-    print(f"Reading units from: {unit_file}")
+    print(f"Reading units from: {graph.mod_dir / unit_file}")
 
-    units = extract_unit_data(unit_file)
+    units = extract_unit_data(graph, unit_file)
 
     print(f"\nFound {len(units)} units:")
     for unit in units:
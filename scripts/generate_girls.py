@@ -16,24 +16,20 @@ Usage:
 
 import re
 import sys
-from pathlib import Path
 
+from mod_graph import load_mod_graph
 
-def generate_girl_entities(input_file, output_file):
+
+def generate_girl_entities(graph, input_file, output_file):
     """Generate GIRL entity variants from base entities."""
     print(f"\n=== Generating GIRL Entities ===")
-    print(f"Reading entities from: {input_file}")
-
-    with open(input_file, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    entity_pattern = r'(<Entity name="([^"]+)".*?</Entity>)'
-    entities = re.findall(entity_pattern, content, re.DOTALL)
+    print(f"Reading entities from: {graph.mod_dir / input_file}")
 
     base_entities = []
-    for entity_xml, entity_name in entities:
+    for entity in graph.definitions(kind="entity", file=input_file):
+        entity_name = entity.key[1]
         if not entity_name.startswith("GIRL-"):
-            base_entities.append((entity_name, entity_xml))
+            base_entities.append((entity_name, graph.source(entity)))
 
     print(f"Found {len(base_entities)} base entities")
 
@@ -67,17 +63,16 @@ def generate_girl_entities(input_file, output_file):
     print(f"✓ Generated {len(girl_entities)} GIRL entities")
 
 
-def generate_girl_unit(input_file, output_file):
+def generate_girl_unit(graph, input_file, output_file):
     """Generate GFL-UNIT-GIRL unit definition from all base units."""
     print(f"\n=== Generating GIRL Unit ===")
-    print(f"Reading units from: {input_file}")
+    print(f"Reading units from: {graph.mod_dir / input_file}")
 
-    with open(input_file, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    class_pattern = r'(<Class\s+name="GFL-DOLL-[^"]+"\s+nameUI="[^"]+"\s+description="[^"]+"\s+numSlots="[^"]+"\s+supply="[^"]+"\s+iconTex="[^"]+"\s+upgrades="[^"]+"\s+maxUpgradeable="[^"]+"\s*/>)'
-
-    classes = re.findall(class_pattern, content, re.DOTALL)
+    classes = [
+        graph.source(doll_class)
+        for doll_class in graph.definitions(kind="class", file=input_file)
+        if doll_class.key[1].startswith("GFL-DOLL-")
+    ]
     print(f"Found {len(classes)} class definitions")
 
     formatted_classes = []
@@ -187,20 +182,19 @@ def main():
     generate_entities = "--entities" in args or "--all" in args or len(args) == 0
     generate_units = "--units" in args or "--all" in args or len(args) == 0
 
-    script_dir = Path(__file__).parent
-    project_dir = script_dir.parent
-
-    entities_input = project_dir / "mod" / "entities" / "gfl_humans.xml"
-    entities_output = project_dir / "mod" / "entities" / "gfl_humans_girl.xml"
+    graph = load_mod_graph()
+    if graph.errors:
+        # Generating from a half-parsed mod would drop definitions
+        sys.exit(1)
 
-    units_input = project_dir / "mod" / "units" / "gfl_unit.xml"
-    units_output = project_dir / "mod" / "units" / "gfl_unit_girl.xml"
+    entities_output = graph.mod_dir / "entities" / "gfl_humans_girl.xml"
+    units_output = graph.mod_dir / "units" / "gfl_unit_girl.xml"
 
     if generate_entities:
-        generate_girl_entities(entities_input, entities_output)
+        generate_girl_entities(graph, "entities/gfl_humans.xml", entities_output)
 
     if generate_units:
-        generate_girl_unit(units_input, units_output)
+        generate_girl_unit(graph, "units/gfl_unit.xml", units_output)
 
 
 if __name__ == "__main__":
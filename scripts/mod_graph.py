@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Parse every XML and localization file in mod/ once into a cross-reference graph.
+
+Nodes are (kind, name) keys:
+- unit, class, entity, pack (voice packs), weapon, ammo, equipment (other
+  gear such as armor and grenades), attack_type and doctrine: things the mod
+  defines, found by name
+- item: an equipment name the mod uses but doesn't define (game built-ins
+  such as "M9 Pistol")
+- string: a localization key, e.g. "@DOLL-AN94-NAME"
+- asset: a "data/..." file path, e.g. "data/sounds/voice/Alva/x.wav"
+- file: an XML file, relative to mod/, standing in for references made
+  outside any definition (GUI layouts, identities)
+
+Edges point from whatever uses something to what it uses: an entity to its
+unit, class, voice pack, equipment, model and textures; a voice pack to its
+clips; a weapon to its attack types and the ammo and sights bound to it; a
+class to its bound loadout; a unit to its classes and doctrine. Both
+directions are indexed, so "who references this file" and "what does this
+entity pull in" are dictionary lookups.
+
+Usage:
+    python scripts/mod_graph.py entity:DEFY-AN94
+    python scripts/mod_graph.py asset:data/sounds/voice/Alva/Series_Daily_001.wav
+    python scripts/mod_graph.py pack:Alva-Voice --closure
+"""
+
+import re
+import sys
+import xml.etree.ElementTree as ET
+import xml.parsers.expat
+from collections import defaultdict
+from pathlib import Path
+
+MOD_DIR = Path(__file__).parent.parent / "mod"
+
+# Kinds an <Item>, <eqp> or <to> name can resolve to, in lookup order
+EQUIPMENT_KINDS = ("weapon", "ammo", "equipment")
+
+# Direct children of an <Equipment> file that define something other than gear
+EQUIPMENT_TAGS = {"Firearm": "weapon", "Ammo": "ammo"}
+
+LOCALIZATION_PATTERN = re.compile(r"^(@#?[^=\s]+)=")
+
+# A start tag, capturing "/" if it closes itself
+START_TAG_PATTERN = re.compile(
+    rb"<[^\s/>]+(?:\s+[^\s=/>]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*\s*(/?)>"
+)
+
+
+class XmlFile:
+    """
+    One parsed XML file: its ElementTree root, plus the source span and
+    line/column of every element.
+    """
+
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+        self.spans = {}
+        self.positions = {}
+        self.root = self._parse()
+
+    def _parse(self):
+        builder = ET.TreeBuilder()
+        parser = xml.parsers.expat.ParserCreate()
+        parser.ordered_attributes = True
+        open_elements = []
+
+        def start(tag, attrs):
+            offset = parser.CurrentByteIndex
+            element = builder.start(tag, dict(zip(attrs[::2], attrs[1::2])))
+            match = START_TAG_PATTERN.match(self.data, offset)
+            empty = match is not None and match.group(1) == b"/"
+            self.spans[element] = (offset, match.end() if empty else None)
+            self.positions[element] = (
+                parser.CurrentLineNumber,
+                parser.CurrentColumnNumber + 1,
+            )
+            open_elements.append(element)
+
+        def end(tag):
+            element = open_elements.pop()
+            start_offset, end_offset = self.spans[element]
+            if end_offset is None:
+                end_offset = self.data.index(b">", parser.CurrentByteIndex) + 1
+                self.spans[element] = (start_offset, end_offset)
+            builder.end(tag)
+
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = builder.data
+        parser.Parse(self.data, True)
+        return builder.close()
+
+    def source(self, element):
+        """An element's XML exactly as written in the file"""
+        start, end = self.spans[element]
+        return self.data[start:end].decode("utf-8")
+
+    def location(self, element):
+        """(line, column) of an element's start tag, both from 1"""
+        return self.positions[element]
+
+    def replace_values(self, replacements):
+        """
+        The file's source with attribute values swapped for
+        replacements[value]. Only the start tags holding them are edited, so
+        the rest of the file keeps its exact formatting.
+
+        Returns: (new source bytes, number of values replaced)
+        """
+        chunks = []
+        position = 0
+        count = 0
+
+        for element in self.root.iter():
+            values = [
+                value for value in element.attrib.values() if value in replacements
+            ]
+            if not values:
+                continue
+
+            start = self.spans[element][0]
+            end = START_TAG_PATTERN.match(self.data, start).end()
+            tag = self.data[start:end]
+            for value in values:
+                for quote in (b'"', b"'"):
+                    old = quote + value.encode("utf-8") + quote
+                    new = quote + replacements[value].encode("utf-8") + quote
+                    count += tag.count(old)
+                    tag = tag.replace(old, new)
+
+            chunks += [self.data[position:start], tag]
+            position = end
+
+        chunks.append(self.data[position:])
+        return b"".join(chunks), count
+
+
+class Definition:
+    """
+    Where a node is defined: the file (relative to mod/), its XML element and
+    location. Localization strings have no element.
+    """
+
+    __slots__ = ("key", "file", "element", "line", "column")
+
+    def __init__(self, key, file, element, line, column=1):
+        self.key = key
+        self.file = file
+        self.element = element
+        self.line = line
+        self.column = column
+
+
+class ModGraph:
+    """
+    Cross-reference graph of everything in a mod directory, or of just some
+    of its XML files (xml_files, relative to mod/) when that's all a tool
+    needs. Partial graphs leave out localization files.
+    """
+
+    def __init__(self, mod_dir=MOD_DIR, xml_files=None):
+        self.mod_dir = Path(mod_dir)
+        self.files = {}
+        self.errors = []
+        self._definitions = defaultdict(list)
+        self._by_kind = defaultdict(dict)
+        self._references = defaultdict(set)
+        self._referenced_by = defaultdict(set)
+        self._edges = []
+
+        if xml_files is not None:
+            for xml_file in xml_files:
+                self._load_xml(self.mod_dir / xml_file)
+        else:
+            for xml_path in sorted(self.mod_dir.rglob("*.xml")):
+                self._load_xml(xml_path)
+            for text_path in sorted((self.mod_dir / "localization").glob("*.txt")):
+                self._load_localization(text_path)
+
+        self._resolve_edges()
+
+    def _load_xml(self, xml_path):
+        rel_path = xml_path.relative_to(self.mod_dir).as_posix()
+
+        try:
+            xml_file = XmlFile(rel_path, xml_path.read_bytes())
+        except (OSError, xml.parsers.expat.ExpatError) as e:
+            self.errors.append((rel_path, e))
+            return
+
+        self.files[rel_path] = xml_file
+        self._walk(xml_file, xml_file.root, None, ("file", rel_path))
+
+    def _load_localization(self, text_path):
+        rel_path = text_path.relative_to(self.mod_dir).as_posix()
+
+        with open(text_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                match = LOCALIZATION_PATTERN.match(line)
+                if match:
+                    key = ("string", match.group(1))
+                    self._define(Definition(key, rel_path, None, line_number))
+
+    def _define(self, definition):
+        self._definitions[definition.key].append(definition)
+        kind, name = definition.key
+        self._by_kind[kind].setdefault(name, None)
+
+    def _link(self, source, target):
+        self._edges.append((source, target))
+
+    def _walk(self, xml_file, element, parent, owner):
+        """
+        Record what an element defines and references, then recurse.
+
+        The owner is the closest enclosing definition (or the file itself),
+        which file paths and localization keys found further down are
+        credited to.
+        """
+        tag = element.tag
+        name = element.get("name")
+        kind = None
+
+        if tag == "Unit":
+            kind = "unit"
+        elif tag == "Class" and parent is not None and parent.tag == "Classes":
+            kind = "class"
+        elif tag == "Entity":
+            kind = "entity"
+        elif tag == "Pack":
+            kind = "pack"
+        elif parent is None:
+            pass
+        elif parent.tag == "FirearmAttackTypes":
+            kind = "attack_type"
+        elif parent.tag == "DoctrineNodes":
+            kind = "doctrine"
+        elif parent.tag == "Equipment" and name and tag not in ("Item", "Bind"):
+            kind = EQUIPMENT_TAGS.get(tag, "equipment")
+
+        if kind and name:
+            key = (kind, name)
+            line, column = xml_file.location(element)
+            self._define(Definition(key, xml_file.path, element, line, column))
+            if kind == "class" and owner[0] == "unit":
+                self._link(owner, key)
+            owner = key
+
+        for attr, value in element.attrib.items():
+            if value.startswith("data/") and Path(value).suffix:
+                self._link(owner, ("asset", value))
+            elif value.startswith("@") and len(value) > 1:
+                self._link(owner, ("string", value))
+            elif attr.lower() == "voicepack":
+                self._link(owner, ("pack", value))
+
+        if tag == "Human":
+            self._link(owner, ("unit", element.get("unit")))
+            self._link(owner, ("class", element.get("class")))
+        elif tag == "Item" and parent is not None and parent.tag == "Equipment":
+            self._link(owner, ("item", name))
+        elif tag == "AttackType" and parent is not None and parent.tag == "AttackTypes":
+            self._link(owner, ("attack_type", name))
+        elif tag == "Node" and kind is None:
+            self._link(owner, ("doctrine", name))
+        elif tag == "GiveBuff":
+            self._link(owner, ("doctrine", element.get("nodeName")))
+            if element.get("targetClass"):
+                self._link(owner, ("class", element.get("targetClass")))
+        elif tag == "Portrait":
+            # Identities aren't named, so the portrait belongs to its class
+            self._link(("class", element.get("class")), ("asset", element.get("tex")))
+        elif tag == "Bind":
+            # <Bind eqp="weapon"><to name="ammo/sight"/> attaches items to
+            # gear; <Bind to="class"><eqp name="gear"/> is a class's loadout
+            if element.get("eqp"):
+                source = ("item", element.get("eqp"))
+                targets = [child.get("name") for child in element.iter("to")]
+            else:
+                source = ("class", element.get("to"))
+                targets = [child.get("name") for child in element.iter("eqp")]
+            for target in targets:
+                self._link(source, ("item", target))
+
+        for child in element:
+            self._walk(xml_file, child, element, owner)
+
+    def _resolve_item(self, key):
+        """Point an equipment name at the weapon, ammo or gear defining it"""
+        if key[0] != "item":
+            return key
+        for kind in EQUIPMENT_KINDS:
+            if (kind, key[1]) in self._definitions:
+                return (kind, key[1])
+        return key
+
+    def _resolve_edges(self):
+        for source, target in self._edges:
+            if source[1] is None or target[1] is None:
+                continue
+            source = self._resolve_item(source)
+            target = self._resolve_item(target)
+            self._references[source].add(target)
+            self._referenced_by[target].add(source)
+
+            for key in (source, target):
+                if key not in self._definitions:
+                    self._by_kind[key[0]].setdefault(key[1], None)
+
+        self._edges = None
+
+    def names(self, kind):
+        """Names of every node of a kind, defined or only referenced, in file order"""
+        return list(self._by_kind.get(kind, ()))
+
+    def definitions(self, key=None, kind=None, file=None):
+        """
+        Definitions of one node, or of every node of a kind, in file order.
+
+        Parameters:
+         - file: Only definitions in this file, relative to mod/ (e.g.
+           "units/gfl_unit.xml")
+        """
+        if key is not None:
+            found = self._definitions.get(key, [])
+        else:
+            found = [
+                definition
+                for name in self._by_kind.get(kind, ())
+                for definition in self._definitions.get((kind, name), [])
+            ]
+        if file is not None:
+            found = [definition for definition in found if definition.file == file]
+        return found
+
+    def is_defined(self, key):
+        """Whether the mod itself defines a node, rather than only using it"""
+        return key in self._definitions
+
+    def references(self, key):
+        """Nodes a node uses directly"""
+        return self._references.get(key, set())
+
+    def referenced_by(self, key):
+        """Nodes that use a node directly"""
+        return self._referenced_by.get(key, set())
+
+    def closure(self, key):
+        """Everything a node pulls in, directly or through other nodes"""
+        seen = set()
+        pending = [key]
+
+        while pending:
+            for target in self.references(pending.pop()):
+                if target not in seen:
+                    seen.add(target)
+                    pending.append(target)
+
+        seen.discard(key)
+        return seen
+
+    def source(self, definition):
+        """A definition's XML exactly as written in its file"""
+        return self.files[definition.file].source(definition.element)
+
+    def asset_file(self, asset):
+        """Local path of a "data/..." asset path inside the mod directory"""
+        return self.mod_dir / asset.removeprefix("data/")
+
+
+def load_mod_graph(mod_dir=MOD_DIR):
+    """Parse a mod directory, warning about files that couldn't be parsed"""
+    graph = ModGraph(mod_dir)
+    for rel_path, error in graph.errors:
+        print(f"Warning: skipping unparseable {rel_path}: {error}")
+    return graph
+
+
+def print_keys(title, keys):
+    """Print a titled, sorted list of kind:name keys"""
+    print(f"{title} ({len(keys)}):")
+    for kind, name in sorted(keys):
+        print(f"  {kind}:{name}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Show what a mod node references and what references it"
+    )
+    parser.add_argument(
+        "node", help="kind:name, e.g. entity:DEFY-AN94 or asset:data/textures/x.dds"
+    )
+    parser.add_argument("--mod-dir", default=MOD_DIR, help="Mod directory")
+    parser.add_argument(
+        "--closure",
+        action="store_true",
+        help="List everything the node pulls in, not just direct references",
+    )
+    args = parser.parse_args()
+
+    kind, _, name = args.node.partition(":")
+    graph = load_mod_graph(args.mod_dir)
+    key = graph._resolve_item((kind, name)) if kind == "item" else (kind, name)
+
+    definitions = graph.definitions(key)
+    if definitions:
+        for definition in definitions:
+            print(f"{key[0]}:{key[1]} defined at {definition.file}:{definition.line}")
+    elif kind == "asset":
+        state = "exists" if graph.asset_file(name).exists() else "is missing"
+        print(f"{args.node} {state} at {graph.asset_file(name)}")
+    else:
+        print(f"{args.node} is not defined in {graph.mod_dir}")
+
+    if args.closure:
+        print_keys("Pulls in", graph.closure(key))
+    else:
+        print_keys("References", graph.references(key))
+    print_keys("Referenced by", graph.referenced_by(key))
+
+    return 0 if definitions or graph.referenced_by(key) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
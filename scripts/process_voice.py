@@ -8,14 +8,285 @@ Made for use with voice lines from https://github.com/beanpuppy/gfl2-voice
 """
 
 import argparse
+import functools
+import math
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import numpy as np
 import soundfile as sf
 from scipy import signal
 
+from script_utils import (
+    VOICE_SAMPLE_RATES,
+    call_quietly,
+    file_hash,
+    load_json,
+    save_json,
+)
+
+# Bump whenever a change to the DSP code alters the rendered output for the
+# same parameters, so incremental builds re-render everything.
+SCRIPT_VERSION = 1
+
+# Build manifest for directory mode: character name -> output filename ->
+# {source_hash, params, version, output_hash}. Kept outside mod/, which is
+# uploaded as the mod.
+MANIFEST_FILE = Path(".process_voice_manifest.json")
+
+# Audio kept either side of the loud region when trimming silence
+TRIM_PADDING_SECONDS = 0.02
+
+# Output formats for directory mode. The game loads both.
+OUTPUT_FORMATS = ("wav", "ogg")
+
+# Radio effect presets. Individual CLI flags override preset values.
+RADIO_PRESETS = {
+    "default": {
+        "highpass_freq": 100,
+        "lowpass_freq": 6000,
+        "mid_boost_freq": 1200,
+        "mid_boost_db": 1,
+        "boost_q": 0.5,
+    },
+    # Lighter band-limiting for lines that get muddy with the default
+    "clear": {
+        "highpass_freq": 80,
+        "lowpass_freq": 8000,
+        "mid_boost_freq": 1200,
+        "mid_boost_db": 0.5,
+        "boost_q": 0.5,
+    },
+    # Narrow, nasal handheld walkie-talkie
+    "walkie": {
+        "highpass_freq": 300,
+        "lowpass_freq": 3400,
+        "mid_boost_freq": 1500,
+        "mid_boost_db": 3,
+        "boost_q": 0.7,
+    },
+}
+
+# Preset used for each character directory, e.g. "Groza": "walkie".
+# Characters not listed here use the "default" preset.
+CHARACTER_PRESETS = {}
+
+
+def resolve_effect_params(preset=None, character_name=None, **overrides):
+    """
+    Build effect parameters for apply_radio_effect.
+
+    Uses the named preset, or the character's entry in CHARACTER_PRESETS when
+    no preset is given. Overrides that are None are ignored.
+    """
+    if preset is None:
+        preset = CHARACTER_PRESETS.get(character_name, "default")
+
+    params = dict(RADIO_PRESETS[preset])
+    params.update({key: value for key, value in overrides.items() if value is not None})
+    return params
+
+
+def peaking_eq_sos(sr, freq, gain_db, q):
+    """
+    Design a peaking EQ biquad as a single second-order section.
+
+    Returns: array of shape (1, 6) usable with signal.sosfilt
+    """
+    # Convert dB to linear gain
+    gain = 10 ** (gain_db / 20)
+
+    w0 = 2 * np.pi * freq / sr
+    alpha = np.sin(w0) / (2 * q)
+
+    # Peaking EQ coefficients
+    b0 = 1 + alpha * gain
+    b1 = -2 * np.cos(w0)
+    b2 = 1 - alpha * gain
+    a0 = 1 + alpha / gain
+    a1 = -2 * np.cos(w0)
+    a2 = 1 - alpha / gain
+
+    # Normalize so a0 == 1
+    return np.array([[b0 / a0, b1 / a0, b2 / a0, 1, a1 / a0, a2 / a0]])
+
+
+class RadioFilterChain:
+    """
+    High-pass, low-pass and midrange peaking EQ fused into one cascade of
+    second-order sections, so the whole chain is a single sosfilt call.
+
+    Use get_filter_chain() rather than constructing this directly, so each
+    (sample rate, parameters) pair is only designed once.
+    """
+
+    def __init__(
+        self, sr, highpass_freq, lowpass_freq, mid_boost_freq, mid_boost_db, boost_q
+    ):
+        self.sr = sr
+        self.highpass_freq = highpass_freq
+        self.lowpass_freq = lowpass_freq
+        self.mid_boost_freq = mid_boost_freq
+        self.mid_boost_db = mid_boost_db
+        self.boost_q = boost_q
+
+        sos_highpass = signal.butter(4, highpass_freq, "highpass", fs=sr, output="sos")
+        sos_lowpass = signal.butter(4, lowpass_freq, "lowpass", fs=sr, output="sos")
+        sos_peaking = peaking_eq_sos(sr, mid_boost_freq, mid_boost_db, boost_q)
+
+        self.sos = np.vstack([sos_highpass, sos_lowpass, sos_peaking])
+        # sosfilt computes in the wider of the coefficient and signal types,
+        # so float32 audio needs float32 coefficients to stay float32
+        self.sos32 = self.sos.astype(np.float32)
+
+    def initial_state(self, channels, dtype=np.float64):
+        """Zero filter state for block-wise filtering with apply(block, zi)."""
+        if channels == 1:
+            return np.zeros((len(self.sos), 2), dtype=dtype)
+        return np.zeros((len(self.sos), 2, channels), dtype=dtype)
+
+    def apply(self, audio, zi=None):
+        """
+        Filter audio along its time axis (axis 0, so stereo stays stereo).
+        The result has audio's dtype.
+
+        If zi is given, returns (filtered, zf) so the final state can be
+        passed to the next block.
+        """
+        sos = self.sos32 if audio.dtype == np.float32 else self.sos
+        if zi is None:
+            return signal.sosfilt(sos, audio, axis=0)
+        return signal.sosfilt(sos, audio, axis=0, zi=zi)
+
+
+@functools.cache
+def get_filter_chain(
+    sr, highpass_freq, lowpass_freq, mid_boost_freq, mid_boost_db, boost_q
+):
+    """Return the cached RadioFilterChain for a sample rate and parameter set."""
+    return RadioFilterChain(
+        sr, highpass_freq, lowpass_freq, mid_boost_freq, mid_boost_db, boost_q
+    )
+
+
+def compress_and_attenuate(audio, out=None, scratch=None):
+    """
+    Subtle soft-clipping compression followed by the -8dB volume reduction.
+
+    Works sample by sample, so it can be applied to whole files or blocks.
+    Pass out=audio to work in place, and a scratch array shaped like audio to
+    avoid allocating anything at all.
+    """
+    # Soft clipping above the threshold t is t*sign(y) + 0.3*(y - t*sign(y)),
+    # which equals 0.3*y + 0.7*clip(y, -t, t). Below the threshold that
+    # expression is just y, so no mask or fancy indexing is needed.
+    threshold = 0.7
+    volume_reduction = 10 ** (-8 / 20)  # Convert -8dB to linear scale
+
+    out = np.multiply(audio, 1.2, out=out)  # Slight gain increase
+    scratch = np.clip(out, -threshold, threshold, out=scratch)
+
+    # Both terms carry the volume reduction
+    out *= 0.3 * volume_reduction
+    scratch *= 0.7 * volume_reduction
+    out += scratch
+    return out
+
+
+# Scratch buffer for the float32 path, grown as needed and reused across files
+_float32_scratch = np.empty(0, dtype=np.float32)
+
+
+def _float32_scratch_like(audio):
+    """Return a float32 scratch array shaped like audio without a fresh allocation."""
+    global _float32_scratch
+    if _float32_scratch.size < audio.size:
+        _float32_scratch = np.empty(audio.size, dtype=np.float32)
+    return _float32_scratch[: audio.size].reshape(audio.shape)
+
+
+def peak(audio):
+    """Absolute peak of a signal, without allocating an abs() copy."""
+    if not audio.size:
+        return 0.0
+    return float(max(audio.max(), -audio.min()))
+
+
+def radio_effect(
+    audio,
+    sr,
+    highpass_freq=100,
+    lowpass_freq=6000,
+    mid_boost_freq=1200,
+    mid_boost_db=1,
+    boost_q=0.5,
+    float32=False,
+):
+    """
+    Apply the radio effect to an in-memory signal with samples along axis 0.
+
+    The filter output is the only full-size allocation; compression and
+    normalization work in place on it. With float32=True the signal is
+    processed in float32 and the compressor uses a reused scratch buffer,
+    roughly halving memory traffic.
+
+    Returns: (processed audio, peak before normalization)
+    """
+    dtype = np.float32 if float32 else np.float64
+
+    # High-pass, low-pass and midrange boost in one pass
+    chain = get_filter_chain(
+        sr, highpass_freq, lowpass_freq, mid_boost_freq, mid_boost_db, boost_q
+    )
+    audio = chain.apply(np.asarray(audio, dtype=dtype))
+
+    # Subtle compression effect (reduce dynamic range)
+    scratch = _float32_scratch_like(audio) if float32 else None
+    compress_and_attenuate(audio, out=audio, scratch=scratch)
+
+    # Normalize to prevent clipping
+    max_val = peak(audio)
+    if max_val > 0.95:
+        audio *= 0.95 / max_val
+
+    return audio, max_val
+
+
+def optimize_payload(audio, sr, trim_silence_db=None, target_sr=None):
+    """
+    Shrink a processed clip before it is written: trim leading and trailing
+    silence, then resample to target_sr. The radio effect's low-pass leaves
+    nothing above 6kHz, so rates much above 16kHz only store empty spectrum.
+
+    Parameters:
+    - trim_silence_db: Trim samples quieter than this level (dBFS, e.g. -50)
+    - target_sr: Resample to this rate (Hz) if it differs from sr
+
+    Returns: (audio, sr)
+    """
+    if trim_silence_db is not None and len(audio):
+        threshold = 10 ** (trim_silence_db / 20)
+        level = np.abs(audio) if audio.ndim == 1 else np.abs(audio).max(axis=1)
+        loud = np.flatnonzero(level > threshold)
+
+        if len(loud):
+            # Keep a little padding so word onsets and tails aren't clipped
+            padding = int(sr * TRIM_PADDING_SECONDS)
+            start = max(loud[0] - padding, 0)
+            end = min(loud[-1] + 1 + padding, len(audio))
+            audio = audio[start:end]
+
+    if target_sr and target_sr != sr:
+        divisor = math.gcd(int(target_sr), int(sr))
+        audio = signal.resample_poly(
+            audio, int(target_sr) // divisor, int(sr) // divisor, axis=0
+        )
+        sr = int(target_sr)
+
+    return audio, sr
+
 
 def apply_radio_effect(
     input_file,
@@ -25,6 +296,9 @@ def apply_radio_effect(
     mid_boost_freq=1200,
     mid_boost_db=1,
     boost_q=0.5,
+    float32=False,
+    trim_silence_db=None,
+    target_sr=None,
 ):
     """
     Apply a radio/walkie-talkie effect to an audio file.
@@ -35,72 +309,116 @@ def apply_radio_effect(
     - mid_boost_freq: Center frequency for midrange boost (Hz)
     - mid_boost_db: Amount of boost in dB
     - boost_q: Q factor for the boost (higher = narrower)
+    - float32: Process in float32 instead of float64
+    - trim_silence_db, target_sr: Size optimizations, see optimize_payload
+
+    The output format follows output_file's extension (.wav or .ogg).
     """
 
     # Load audio
-    audio, sr = sf.read(input_file)
+    audio, sr = sf.read(input_file, dtype="float32" if float32 else "float64")
 
     print(f"Processing: {input_file}")
     print(f"Sample rate: {sr} Hz")
     print(f"Duration: {len(audio) / sr:.2f} seconds")
 
-    # High-pass filter (remove bass)
-    sos_highpass = signal.butter(4, highpass_freq, "highpass", fs=sr, output="sos")
-    audio = signal.sosfilt(sos_highpass, audio)
+    audio, max_val = radio_effect(
+        audio,
+        sr,
+        highpass_freq=highpass_freq,
+        lowpass_freq=lowpass_freq,
+        mid_boost_freq=mid_boost_freq,
+        mid_boost_db=mid_boost_db,
+        boost_q=boost_q,
+        float32=float32,
+    )
     print(f"Applied high-pass filter at {highpass_freq} Hz")
-
-    # Low-pass filter (remove high frequencies)
-    sos_lowpass = signal.butter(4, lowpass_freq, "lowpass", fs=sr, output="sos")
-    audio = signal.sosfilt(sos_lowpass, audio)
     print(f"Applied low-pass filter at {lowpass_freq} Hz")
+    print(f"Applied midrange boost: +{mid_boost_db} dB at {mid_boost_freq} Hz")
+    print("Applied soft compression")
+    print("Applied -8dB volume reduction")
+    if max_val > 0.95:
+        print(f"Normalized audio (peak was {max_val:.3f})")
 
-    # Midrange boost using peaking EQ
-    # Convert dB to linear gain
-    gain = 10 ** (mid_boost_db / 20)
+    if trim_silence_db is not None or target_sr:
+        duration = len(audio) / sr
+        audio, sr = optimize_payload(audio, sr, trim_silence_db, target_sr)
+        print(
+            f"Optimized payload: {duration:.2f} s -> {len(audio) / sr:.2f} s at {sr} Hz"
+        )
+
+    sf.write(output_file, audio, sr)
+    print(f"\nSaved to: {output_file}")
+    rms = np.sqrt(np.vdot(audio, audio) / audio.size) if audio.size else 0.0
+    print(f"Final RMS: {rms:.6f}")
 
-    # Design peaking filter
-    w0 = 2 * np.pi * mid_boost_freq / sr
-    alpha = np.sin(w0) / (2 * boost_q)
 
-    # Peaking EQ coefficients
-    b0 = 1 + alpha * gain
-    b1 = -2 * np.cos(w0)
-    b2 = 1 - alpha * gain
-    a0 = 1 + alpha / gain
-    a1 = -2 * np.cos(w0)
-    a2 = 1 - alpha / gain
+def apply_radio_effect_streaming(
+    input_file,
+    output_file,
+    block_size=65536,
+    highpass_freq=100,
+    lowpass_freq=6000,
+    mid_boost_freq=1200,
+    mid_boost_db=1,
+    boost_q=0.5,
+    float32=False,
+):
+    """
+    Apply the same effect as apply_radio_effect, reading and writing the file
+    in blocks of block_size frames so memory use doesn't grow with its length.
 
-    # Normalize
-    b = np.array([b0 / a0, b1 / a0, b2 / a0])
-    a = np.array([1, a1 / a0, a2 / a0])
+    The input is read twice: the first pass only measures the output peak
+    for normalization, the second filters again and writes each block as it
+    is done. Filter state is carried between blocks, so the output matches
+    apply_radio_effect.
+    """
+    info = sf.info(input_file)
+    sr = info.samplerate
 
-    audio = signal.lfilter(b, a, audio)
-    print(f"Applied midrange boost: +{mid_boost_db} dB at {mid_boost_freq} Hz")
+    print(f"Processing (streaming): {input_file}")
+    print(f"Sample rate: {sr} Hz")
+    print(f"Duration: {info.frames / sr:.2f} seconds")
 
-    # Subtle compression effect (reduce dynamic range)
-    # Simple soft-clipping style compression
-    threshold = 0.7
-    audio = audio * 1.2  # Slight gain increase
-    mask = np.abs(audio) > threshold
-    audio[mask] = threshold * np.sign(audio[mask]) + 0.3 * (
-        audio[mask] - threshold * np.sign(audio[mask])
+    chain = get_filter_chain(
+        sr, highpass_freq, lowpass_freq, mid_boost_freq, mid_boost_db, boost_q
     )
-    print("Applied soft compression")
 
-    # Reduce volume by 8dB
-    volume_reduction = 10 ** (-8 / 20)  # Convert -8dB to linear scale
-    audio = audio * volume_reduction
-    print("Applied -8dB volume reduction")
+    dtype = np.float32 if float32 else np.float64
 
-    # Normalize to prevent clipping
-    max_val = np.abs(audio).max()
+    def processed_blocks():
+        zi = chain.initial_state(info.channels, dtype)
+        for block in sf.blocks(input_file, blocksize=block_size, dtype=dtype.__name__):
+            block, zi = chain.apply(block, zi)
+            yield compress_and_attenuate(block, out=block)
+
+    # First pass: find the peak
+    max_val = 0.0
+    for block in processed_blocks():
+        max_val = max(max_val, peak(block))
+
+    scale = 1.0
     if max_val > 0.95:
-        audio = audio * (0.95 / max_val)
+        scale = 0.95 / max_val
+
+    # Second pass: render and write
+    sum_squares = 0.0
+    with sf.SoundFile(
+        output_file, "w", samplerate=sr, channels=info.channels
+    ) as output:
+        for block in processed_blocks():
+            block *= scale
+            sum_squares += np.vdot(block, block)
+            output.write(block)
+
+    print(f"Applied filter chain in blocks of {block_size} frames")
+    print("Applied soft compression and -8dB volume reduction")
+    if scale != 1.0:
         print(f"Normalized audio (peak was {max_val:.3f})")
 
-    sf.write(output_file, audio, sr)
     print(f"\nSaved to: {output_file}")
-    print(f"Final RMS: {np.sqrt(np.mean(audio**2)):.6f}")
+    samples = info.frames * info.channels
+    print(f"Final RMS: {np.sqrt(sum_squares / samples) if samples else 0.0:.6f}")
 
 
 def shorten_filename(filename, character_name):
@@ -121,13 +439,66 @@ def shorten_filename(filename, character_name):
     return filename, True
 
 
-def process_directory(input_dir, character_name, **effect_params):
+def load_manifest(character_name):
+    """
+    Load the build manifest for a character directory.
+
+    Returns: dict of output filename -> {source_hash, params, version, output_hash}
+    """
+    return load_json(MANIFEST_FILE, {}).get(character_name, {})
+
+
+def save_manifest(character_name, manifest):
+    """Write a character's build manifest atomically, keeping the others."""
+    manifests = load_json(MANIFEST_FILE, {})
+    manifests[character_name] = manifest
+    save_json(MANIFEST_FILE, manifests)
+
+
+def is_up_to_date(entry, source_hash, effect_params, output_file):
+    """Check a manifest entry against the current source, parameters and output."""
+    return (
+        entry is not None
+        and entry.get("version") == SCRIPT_VERSION
+        and entry.get("source_hash") == source_hash
+        and entry.get("params") == effect_params
+        and output_file.exists()
+        and entry.get("output_hash") == file_hash(output_file)
+    )
+
+
+def _apply_radio_effect_quietly(render, input_file, output_file, effect_params):
+    """
+    Worker for --jobs: render one file through call_quietly.
+
+    Returns: error message, or None on success
+    """
+    try:
+        call_quietly(render, input_file, output_file, **effect_params)
+    except Exception as e:
+        return str(e)
+    return None
+
+
+def process_directory(
+    input_dir,
+    character_name,
+    jobs=1,
+    render=apply_radio_effect,
+    force=False,
+    output_format="wav",
+    **effect_params,
+):
     """
     Process all audio files in a directory and output to mod/sounds/voice/<character_name>/
 
     Parameters:
     - input_dir: Path to directory containing audio files
     - character_name: Name for the output subdirectory
+    - jobs: Number of worker processes (1 = serial with full log, 0 = one per CPU core)
+    - render: Effect function, apply_radio_effect or apply_radio_effect_streaming
+    - force: Re-render files even if the manifest says they're up to date
+    - output_format: "wav" or "ogg" (Ogg Vorbis, much smaller)
     - effect_params: Parameters to pass to apply_radio_effect
     """
     input_path = Path(input_dir)
@@ -168,9 +539,15 @@ def process_directory(input_dir, character_name, **effect_params):
     failed_files = []
     shortened_count = 0
 
-    for i, input_file in enumerate(audio_files, 1):
+    manifest = load_manifest(character_name)
+    source_hashes = {}
+    up_to_date_count = 0
+
+    tasks = []
+    output_files = []
+    for input_file in audio_files:
         # Create output filename
-        output_filename = input_file.stem + ".wav"
+        output_filename = f"{input_file.stem}.{output_format}"
 
         output_filename, was_shortened = shorten_filename(
             output_filename, character_name
@@ -178,27 +555,107 @@ def process_directory(input_dir, character_name, **effect_params):
         shortened_count += 1
 
         output_file = output_dir / output_filename
+        output_files.append(output_file)
+        source_hashes[input_file] = file_hash(input_file)
+
+        if not force and is_up_to_date(
+            manifest.get(output_filename),
+            source_hashes[input_file],
+            effect_params,
+            output_file,
+        ):
+            up_to_date_count += 1
+            continue
+
+        tasks.append((input_file, output_file))
+
+    if up_to_date_count:
+        print(
+            f"Skipping {up_to_date_count} up-to-date file(s) (use --force to rebuild)"
+        )
 
-        print(f"\n[{i}/{len(audio_files)}] Processing: {input_file.name}")
-        print("-" * 60)
-
-        try:
-            apply_radio_effect(str(input_file), str(output_file), **effect_params)
-            success_count += 1
-        except Exception as e:
-            print(f"Failed: {e}")
-            failed_files.append(input_file.name)
-
-        print("-" * 60)
+    rendered = []
+
+    # Files are filtered one at a time, never stacked into a 2-D batch:
+    # sosfilt runs its recursion row by row, and padding clips into a
+    # (samples, clips) array measured 3-7x slower than this per-file loop.
+    # Parallelism comes from --jobs instead.
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    if jobs > 1:
+        print(f"Processing with {jobs} worker processes\n")
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                pool.submit(
+                    _apply_radio_effect_quietly,
+                    render,
+                    str(input_file),
+                    str(output_file),
+                    effect_params,
+                )
+                for input_file, output_file in tasks
+            ]
+
+            # Report in submission order so the log reads the same every run
+            for i, ((input_file, output_file), future) in enumerate(
+                zip(tasks, futures), 1
+            ):
+                error = future.result()
+                if error is None:
+                    success_count += 1
+                    rendered.append((input_file, output_file))
+                    print(f"[{i}/{len(tasks)}] {input_file.name} -> {output_file.name}")
+                else:
+                    failed_files.append(input_file.name)
+                    print(f"[{i}/{len(tasks)}] {input_file.name} FAILED: {error}")
+
+    else:
+        for i, (input_file, output_file) in enumerate(tasks, 1):
+            print(f"\n[{i}/{len(tasks)}] Processing: {input_file.name}")
+            print("-" * 60)
+
+            try:
+                render(str(input_file), str(output_file), **effect_params)
+                success_count += 1
+                rendered.append((input_file, output_file))
+            except Exception as e:
+                print(f"Failed: {e}")
+                failed_files.append(input_file.name)
+
+            print("-" * 60)
+
+    for input_file, output_file in rendered:
+        manifest[output_file.name] = {
+            "source": input_file.name,
+            "source_hash": source_hashes[input_file],
+            "params": effect_params,
+            "version": SCRIPT_VERSION,
+            "output_hash": file_hash(output_file),
+        }
+
+    if rendered:
+        save_manifest(character_name, manifest)
 
     # Summary
     print("\n" + "=" * 60)
     print("PROCESSING SUMMARY")
     print("=" * 60)
     print(f"Total files: {len(audio_files)}")
+    print(f"Up to date: {up_to_date_count}")
     print(f"Successful: {success_count}")
     print(f"Failed: {len(failed_files)}")
 
+    source_size = sum(path.stat().st_size for path in audio_files)
+    output_size = sum(path.stat().st_size for path in output_files if path.exists())
+    if source_size:
+        change = (output_size - source_size) / source_size * 100
+        print(
+            f"Size: {source_size / 1e6:.2f} MB source -> "
+            f"{output_size / 1e6:.2f} MB output ({change:+.0f}%)"
+        )
+
     if failed_files:
         print("\nFailed files:")
         for filename in failed_files:
@@ -221,9 +678,24 @@ Examples:
   Process without shortening filenames:
     python process_voice.py /path/to/audio/dir CharacterName --no-shorten
 
+  Process a directory across all CPU cores:
+    python process_voice.py /path/to/audio/dir CharacterName --jobs 0
+
   Single file processing:
     python process_voice.py input.wav output.wav
     python process_voice.py input.wav output.wav --highpass 200 --lowpass 3000
+
+  Shrink the voice pack: trim silence, resample to 16kHz and encode as Ogg Vorbis:
+    python process_voice.py /path/to/audio/dir CharacterName --trim-silence -50 --target-rate 16000 --format ogg
+
+  Re-render every file, ignoring the build manifest:
+    python process_voice.py /path/to/audio/dir CharacterName --force
+
+  Process a long recording in blocks with bounded memory:
+    python process_voice.py ambience.wav output.wav --stream
+
+  Use a named preset (flags override individual values):
+    python process_voice.py input.wav output.wav --preset walkie --mid-db 2
         """,
     )
 
@@ -237,34 +709,80 @@ Examples:
         action="store_true",
         help="Don't shorten filenames when processing (keep original names)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for directory mode (default: 1, 0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render all files in directory mode, even if they're up to date",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Process files block by block with bounded memory (for long recordings)",
+    )
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=65536,
+        help="Frames per block in --stream mode (default: 65536)",
+    )
+    parser.add_argument(
+        "--float32",
+        action="store_true",
+        help="Process in float32 with in-place buffers (less memory, output within 2 LSB at 16-bit)",
+    )
+    parser.add_argument(
+        "--trim-silence",
+        type=float,
+        metavar="DB",
+        help="Trim leading/trailing audio quieter than this level in dBFS (e.g. -50)",
+    )
+    parser.add_argument(
+        "--target-rate",
+        type=int,
+        choices=VOICE_SAMPLE_RATES,
+        metavar="HZ",
+        help="Resample output to this rate (e.g. 16000; the 6kHz low-pass makes 44.1kHz wasteful)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="wav",
+        help="Output format for directory mode (default: wav). Voice XML paths must use the same extension",
+    )
+    parser.add_argument(
+        "--preset",
+        choices=sorted(RADIO_PRESETS),
+        help="Radio effect preset (default: the character's entry in CHARACTER_PRESETS, else default)",
+    )
     parser.add_argument(
         "--highpass",
         type=float,
-        default=100,
         help="High-pass filter frequency in Hz (default: 100, try 80-200)",
     )
     parser.add_argument(
         "--lowpass",
         type=float,
-        default=6000,
         help="Low-pass filter frequency in Hz (default: 6000, try 5000-8000)",
     )
     parser.add_argument(
         "--mid-boost",
         type=float,
-        default=1200,
         help="Midrange boost center frequency in Hz (default: 1200, try 1000-1500)",
     )
     parser.add_argument(
         "--mid-db",
         type=float,
-        default=1,
         help="Midrange boost amount in dB (default: 1, try 0.5-3)",
     )
     parser.add_argument(
         "--boost-q",
         type=float,
-        default=0.5,
         help="Q factor for midrange boost (default: 0.5, higher = narrower)",
     )
 
@@ -277,13 +795,29 @@ Examples:
         print(f"Error: '{args.input}' not found!")
         sys.exit(1)
 
-    effect_params = {
-        "highpass_freq": args.highpass,
-        "lowpass_freq": args.lowpass,
-        "mid_boost_freq": args.mid_boost,
-        "mid_boost_db": args.mid_db,
-        "boost_q": args.boost_q,
-    }
+    # In directory mode the output argument is the character name
+    effect_params = resolve_effect_params(
+        preset=args.preset,
+        character_name=args.output if input_path.is_dir() else None,
+        highpass_freq=args.highpass,
+        lowpass_freq=args.lowpass,
+        mid_boost_freq=args.mid_boost,
+        mid_boost_db=args.mid_db,
+        boost_q=args.boost_q,
+        float32=args.float32,
+        trim_silence_db=args.trim_silence,
+        target_sr=args.target_rate,
+    )
+
+    if args.stream and (args.trim_silence is not None or args.target_rate):
+        print("Error: --stream doesn't support --trim-silence or --target-rate")
+        sys.exit(1)
+
+    render = apply_radio_effect
+    if args.stream:
+        render = functools.partial(
+            apply_radio_effect_streaming, block_size=args.block_size
+        )
 
     print("=" * 60)
     print("VOICE FILE PROCESSOR")
@@ -294,7 +828,15 @@ Examples:
         if input_path.is_dir():
             # Directory processing mode
             character_name = args.output
-            process_directory(args.input, character_name, **effect_params)
+            process_directory(
+                args.input,
+                character_name,
+                jobs=args.jobs,
+                render=render,
+                force=args.force,
+                output_format=args.format,
+                **effect_params,
+            )
         else:
             # Single file processing mode
             output_file = args.output
@@ -305,7 +847,7 @@ Examples:
                 os.makedirs(output_dir)
                 print(f"Created output directory: {output_dir}")
 
-            apply_radio_effect(args.input, output_file, **effect_params)
+            render(args.input, output_file, **effect_params)
 
             print("\n" + "=" * 60)
             print("Processing complete!")
@@ -0,0 +1,69 @@
+"""
+Helpers shared by the voice scripts: content hashes and the JSON files they
+use as build caches and manifests, quiet calls for worker processes, and the
+audio settings and transcription store more than one script uses.
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+# Sample rates process_voice.py renders voice clips at (the source rate, or
+# --target-rate) and validate_voice_files.py accepts
+VOICE_SAMPLE_RATES = (16000, 22050, 44100, 48000)
+
+# Searchable copy of every _trans.txt, written by transcribe_voices.py and read
+# by search_voice_lines.py; STORE_VERSION is its schema's PRAGMA user_version.
+# Kept outside mod/, which is uploaded as the mod.
+DEFAULT_STORE = Path(".voice_transcriptions.db")
+STORE_VERSION = 1
+
+
+def file_hash(file_path):
+    """SHA-256 hex digest of a file's contents, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_json(json_file, default):
+    """
+    Load a JSON cache or manifest.
+
+    Returns: its contents, or default if it's missing or unreadable
+    """
+    try:
+        with open(json_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(json_file, data):
+    """Write a JSON cache or manifest atomically."""
+    temp_file = json_file.with_suffix(".tmp")
+
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+
+    os.replace(temp_file, json_file)
+
+
+def call_quietly(fn, *args, **kwargs):
+    """
+    Call fn with its printed log captured, for work run in a worker process:
+    the caller prints the log (or a summary) itself, so output from several
+    workers doesn't interleave.
+
+    Returns: (fn's result, captured log)
+    """
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        result = fn(*args, **kwargs)
+    return result, log.getvalue()
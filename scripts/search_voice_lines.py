@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Search voice line transcriptions across every character.
+
+Reads the store transcribe_voices.py keeps at the repo root
+(.voice_transcriptions.db, or wherever its --store points). Text queries use
+its full-text index, so English words match other forms of the same word
+("clear" also finds "cleared"), and the usual FTS5 syntax works: "room clear"
+for a phrase, clear OR secure, clear NOT room, cle* for a prefix, or
+translation:clear to search one column (file, translation or transcript).
+
+Usage:
+    python scripts/search_voice_lines.py clear
+    python scripts/search_voice_lines.py clear --max-duration 2
+    python scripts/search_voice_lines.py "room clear" --character Alva
+    python scripts/search_voice_lines.py --character Groza --min-duration 5
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+from script_utils import DEFAULT_STORE, STORE_VERSION
+
+
+def search_lines(
+    store,
+    query=None,
+    character=None,
+    min_duration=None,
+    max_duration=None,
+    model=None,
+    include_skipped=False,
+    limit=None,
+):
+    """
+    Find voice lines matching a full-text query and filters.
+
+    Returns: list of row dicts, best text matches first, or sorted by file
+    when there's no query
+    """
+    sql = (
+        "SELECT lines.file, lines.character, lines.duration, lines.translation,"
+        " lines.transcript, lines.model, lines.skipped FROM lines"
+    )
+    conditions = []
+    params = []
+
+    if query:
+        sql += " JOIN lines_fts ON lines_fts.rowid = lines.id"
+        conditions.append("lines_fts MATCH ?")
+        params.append(query)
+    if character:
+        conditions.append("lines.character = ? COLLATE NOCASE")
+        params.append(character)
+    if min_duration is not None:
+        conditions.append("lines.duration >= ?")
+        params.append(min_duration)
+    if max_duration is not None:
+        conditions.append("lines.duration < ?")
+        params.append(max_duration)
+    if model:
+        conditions.append("lines.model = ?")
+        params.append(model)
+    if not include_skipped:
+        conditions.append("lines.skipped IS NULL")
+
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY bm25(lines_fts)" if query else " ORDER BY lines.file"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    store.row_factory = sqlite3.Row
+    return [dict(row) for row in store.execute(sql, params)]
+
+
+def print_line(row):
+    """Print one voice line the way _trans.txt lays it out"""
+    duration = f"{row['duration']:.1f} s" if row["duration"] is not None else "?"
+    print(f"{row['file']} ({duration})")
+
+    if row["skipped"]:
+        print(f"  (skipped: {row['skipped']})")
+    else:
+        print(f"  {row['translation']}")
+        if row["transcript"]:
+            print(f"  JA: {row['transcript']}")
+    if row["model"]:
+        print(f"  Model: {row['model']}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Search voice line transcriptions across every character"
+    )
+    parser.add_argument(
+        "query", nargs="?", help="Full-text query (FTS5 syntax), e.g. clear"
+    )
+    parser.add_argument(
+        "--store",
+        default=str(DEFAULT_STORE),
+        help=f"Store written by transcribe_voices.py (default: {DEFAULT_STORE})",
+    )
+    parser.add_argument("--character", help="Only this character's lines")
+    parser.add_argument(
+        "--min-duration", type=float, help="Only clips at least this many seconds long"
+    )
+    parser.add_argument(
+        "--max-duration", type=float, help="Only clips shorter than this many seconds"
+    )
+    parser.add_argument("--model", help="Only lines from this model, e.g. large")
+    parser.add_argument(
+        "--include-skipped",
+        action="store_true",
+        help="Include clips the speech pre-filter skipped",
+    )
+    parser.add_argument("--limit", type=int, help="Show at most this many lines")
+    parser.add_argument(
+        "--json", action="store_true", help="Print matches as a JSON list"
+    )
+    args = parser.parse_args()
+
+    store_file = Path(args.store)
+    if not store_file.exists():
+        print(f"Error: {store_file} not found, run transcribe_voices.py first")
+        return 1
+
+    store = sqlite3.connect(f"file:{store_file}?mode=ro", uri=True)
+    try:
+        if store.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+            print(
+                f"Error: {store_file} is from another version of"
+                " transcribe_voices.py, run it again to rebuild the store"
+            )
+            return 1
+        rows = search_lines(
+            store,
+            args.query,
+            args.character,
+            args.min_duration,
+            args.max_duration,
+            args.model,
+            args.include_skipped,
+            args.limit,
+        )
+    except sqlite3.OperationalError as e:
+        print(f"Error: invalid query {args.query!r}: {e}")
+        return 1
+    finally:
+        store.close()
+
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        return 0
+
+    for row in rows:
+        print_line(row)
+
+    print(f"{len(rows)} matching line(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
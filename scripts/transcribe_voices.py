@@ -1,12 +1,38 @@
 #!/usr/bin/env python3
 """Transcribe and translate Japanese voice files to English"""
 
+import contextlib
+import difflib
+import io
+import itertools
+import json
+import math
+import multiprocessing
 import os
+import socket
+import socketserver
+import sqlite3
+import stat
+import sys
+import tempfile
+import threading
+import time
 import warnings
-import whisper
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-import sys
-import torch
+
+import numpy as np
+import soundfile as sf
+from scipy import signal
+
+from script_utils import (
+    DEFAULT_STORE,
+    STORE_VERSION,
+    call_quietly,
+    file_hash,
+    load_json,
+    save_json,
+)
 
 # Suppress specific ROCm warnings
 warnings.filterwarnings("ignore", message=".*hipBLASLt.*")
@@ -16,54 +42,1098 @@ warnings.filterwarnings("ignore", message=".*Memory Efficient attention.*")
 # Enable experimental ROCm features for better performance on newer AMD GPUs
 os.environ.setdefault("TORCH_ROCM_AOTRITON_ENABLE_EXPERIMENTAL", "1")
 
+# torch and whisper take seconds to import, so they're loaded by import_whisper
+# on first use. Runs with nothing to transcribe, or served by a --serve
+# worker, never import them.
+torch = None
+whisper = None
+
+
+TASK = "translate"
+
+# Whisper model sizes, smallest first
+MODEL_SIZES = ["tiny", "base", "small", "medium", "large"]
+
+# --check-quantize: clips compared, and the mean similarity the int8 model's
+# text must keep against fp32
+QUANTIZE_SAMPLE_SIZE = 20
+QUANTIZE_MIN_SIMILARITY = 0.9
+
+# Per-clip results, shared by every character directory and kept next to the
+# store (outside mod/, which is uploaded as the mod)
+CACHE_NAME = ".transcribe_cache.json"
+CACHE_VERSION = 1
+
+# Unix socket a --serve worker listens on. Without a runtime directory it goes
+# in a per-user directory serve() creates with 0700 permissions, rather than
+# straight into the shared temp directory.
+DEFAULT_SOCKET = (
+    Path(
+        os.environ.get("XDG_RUNTIME_DIR")
+        or Path(tempfile.gettempdir()) / f"transcribe_voices-{os.getuid()}"
+    )
+    / "transcribe_voices.sock"
+)
+
+# --cascade sends a clip on to the larger model when the small model's result
+# has a segment past any of these
+CASCADE_THRESHOLDS = {
+    "logprob": -0.6,
+    "no_speech": 0.4,
+    "compression_ratio": 2.0,
+}
+
+# Threads decoding clips ahead of the model
+PREFETCH_THREADS = 4
+
+# Speech pre-filter: clips with less than MIN_SPEECH_SECONDS of frames within
+# VAD_RANGE_DB of their loudest frame (and above VAD_FLOOR_DB) in the radio
+# voice band are skipped without running Whisper
+VAD_BAND = (300, 3400)
+VAD_FRAME_SECONDS = 0.03
+VAD_FLOOR_DB = -50.0
+VAD_RANGE_DB = 30.0
+MIN_SPEECH_SECONDS = 0.2
+
+# Thresholds model.transcribe uses to judge a decode, applied to batched results
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
 
-def transcribe_character_dir(character_dir, model, device):
+# Packing: silence between clips in a shared window, and the longest clip packed
+PACK_GAP_SECONDS = 1.0
+PACK_MAX_CLIP_SECONDS = 10.0
+
+
+def import_whisper():
+    """Import torch and whisper into the module globals, once"""
+    global torch, whisper
+
+    if whisper is None:
+        import torch as torch_module
+        import whisper as whisper_module
+
+        torch, whisper = torch_module, whisper_module
+
+
+def select_device(quantize=None):
+    """
+    Pick CUDA if it's available, printing which device is used. Quantized
+    models always run on the CPU.
     """
-    Transcribe all voice files in a character directory.
+    if quantize:
+        print(f"\nUsing device: cpu ({quantize} dynamic quantization)")
+        return "cpu"
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    print(f"\nUsing device: {device}")
+    if device == "cuda":
+        print(f"GPU: {torch.cuda.get_device_name(0)}")
+    return device
+
+
+def model_label(model_name, quantize=None):
+    """Name a model and its quantization for cache keys, e.g. large-int8"""
+    return f"{model_name}-{quantize}" if quantize else model_name
 
-    Returns a list of translation results.
+
+def load_whisper_model(model_name, device, quantize=None):
+    """
+    Load a Whisper model, optionally with int8 dynamic quantization of its
+    linear layers.
+
+    Dynamic quantization only runs on the CPU and only replaces modules that
+    are exactly torch.nn.Linear, so Whisper's Linear subclass (which just
+    casts weights to the input dtype) is turned back into a plain
+    nn.Linear first.
     """
-    # Find all audio files
+    model = whisper.load_model(model_name, device=device)
+
+    if quantize == "int8":
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear):
+                module.__class__ = torch.nn.Linear
+
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+
+    return model
+
+
+def find_audio_files(character_dir):
+    """Get all audio files in a character directory, sorted by name"""
     audio_extensions = {".wav", ".ogg", ".flac", ".mp3", ".m4a"}
     audio_files = []
 
     for ext in audio_extensions:
         audio_files.extend(character_dir.glob(f"*{ext}"))
 
-    audio_files = sorted(audio_files)
+    return sorted(audio_files)
+
+
+def speech_activity(audio_file):
+    """
+    Score a clip's speech energy in the radio voice band.
+
+    The clip is mixed to mono, band-passed to VAD_BAND and split into
+    half-overlapping frames. A frame counts as active if its RMS level is
+    above VAD_FLOOR_DB and within VAD_RANGE_DB of the loudest frame.
+
+    Returns: (seconds of active frames, loudest frame level in dBFS)
+    """
+    audio, sr = sf.read(audio_file, dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+
+    sos = signal.butter(4, VAD_BAND, btype="bandpass", fs=sr, output="sos")
+    band = signal.sosfilt(sos, audio)
+
+    frame = max(1, int(VAD_FRAME_SECONDS * sr))
+    hop = max(1, frame // 2)
+    if len(band) < frame:
+        band = np.pad(band, (0, frame - len(band)))
+
+    frames = np.lib.stride_tricks.sliding_window_view(band, frame)[::hop]
+    levels = 10 * np.log10(np.mean(frames**2, axis=1) + 1e-20)
+    loudest = float(levels.max())
+
+    active = levels > max(loudest - VAD_RANGE_DB, VAD_FLOOR_DB)
+    return active.sum() * hop / sr, loudest
+
+
+def vad_skip_reason(audio_file):
+    """
+    Check whether a clip has enough speech energy to be worth transcribing.
+
+    Returns: reason to skip the clip, or None if it should be transcribed
+    (including when it can't be read here; Whisper gets to try it then)
+    """
+    try:
+        seconds, loudest = speech_activity(audio_file)
+    except Exception:
+        return None
+
+    if loudest <= VAD_FLOOR_DB:
+        return f"silent, loudest frame {loudest:.0f} dBFS"
+    if seconds < MIN_SPEECH_SECONDS:
+        return f"only {seconds:.2f} s of speech energy"
+    return None
+
+
+def load_audio(audio_file):
+    """
+    Decode a clip to mono float32 at Whisper's 16 kHz.
+
+    Files soundfile can read are decoded and resampled in process with a
+    polyphase filter. Anything else (mp3 and m4a on older libsndfile) goes
+    through whisper.load_audio, which runs ffmpeg.
+    """
+    try:
+        audio, sr = sf.read(audio_file, dtype="float32", always_2d=True)
+    except sf.LibsndfileError:
+        return whisper.load_audio(str(audio_file))
+
+    audio = audio.mean(axis=1)
+    target_sr = whisper.audio.SAMPLE_RATE
+
+    if sr != target_sr:
+        divisor = math.gcd(sr, target_sr)
+        audio = signal.resample_poly(audio, target_sr // divisor, sr // divisor)
+
+    return audio.astype(np.float32, copy=False)
+
+
+def load_audio_or_error(audio_file):
+    """load_audio for a prefetch thread: returns the exception instead of raising"""
+    try:
+        return load_audio(audio_file)
+    except Exception as e:
+        return e
+
+
+def transcribe_file(audio, model, device):
+    """Transcribe and translate one decoded clip to English with model.transcribe"""
+    use_fp16 = device == "cuda"
+    result = model.transcribe(audio, language="ja", task="translate", fp16=use_fp16)
+    return result["text"].strip()
+
+
+def transcribe_remaining(texts, audios, model, device):
+    """Fill each None in texts by running transcribe_file on that clip"""
+    for i, audio in enumerate(audios):
+        if texts[i] is None:
+            try:
+                texts[i] = transcribe_file(audio, model, device)
+            except Exception as e:
+                texts[i] = e
+
+
+def needs_fallback(result):
+    """
+    Whether a greedy DecodingResult fails the checks model.transcribe uses to
+    retry at a higher temperature: too repetitive or too unlikely.
+    """
+    return (
+        result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+        or result.avg_logprob < LOGPROB_THRESHOLD
+    )
+
+
+def transcribe_batch(audios, model, device):
+    """
+    Transcribe and translate several clips with one encoder and decoder pass.
+
+    Every clip that fits in Whisper's 30-second window is turned into a
+    log-mel spectrogram and the stack is decoded together. Clips that are
+    longer, or whose greedy decode fails the same checks model.transcribe
+    uses to retry at a higher temperature, go through transcribe_file instead.
+
+    Parameters:
+     - audios: Clips from load_audio_or_error
+
+    Returns: list with the English text ("" if no speech) or the exception
+    raised for each clip, in input order
+    """
+    texts = [audio if isinstance(audio, Exception) else None for audio in audios]
+    mels = []
+    batch_indices = []
+
+    for i, audio in enumerate(audios):
+        if texts[i] is not None or len(audio) > whisper.audio.N_SAMPLES:
+            continue
+
+        audio = whisper.pad_or_trim(audio)
+        mels.append(whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels))
+        batch_indices.append(i)
+
+    if mels:
+        options = whisper.DecodingOptions(
+            language="ja", task="translate", temperature=0.0, fp16=device == "cuda"
+        )
+        mel = torch.stack(mels).to(model.device)
+        decoded = whisper.decode(model, mel, options)
+
+        for i, result in zip(batch_indices, decoded):
+            if (
+                result.no_speech_prob > NO_SPEECH_THRESHOLD
+                and result.avg_logprob < LOGPROB_THRESHOLD
+            ):
+                texts[i] = ""
+            elif not needs_fallback(result):
+                texts[i] = result.text.strip()
+
+    transcribe_remaining(texts, audios, model, device)
+    return texts
+
+
+def transcribe_bilingual(audios, model, device):
+    """
+    Transcribe each clip in Japanese and translate it to English with one
+    encoder pass.
+
+    Clips that fit in Whisper's 30-second window are encoded together with
+    model.embed_audio. The encoder output is decoded twice, once per task.
+    A task whose greedy decode fails model.transcribe's checks, and clips
+    longer than the window, fall back to model.transcribe for that task.
+
+    Parameters:
+     - audios: Clips from load_audio_or_error
+
+    Returns: list with {"translation", "transcript"} ("" for both if no
+    speech) or the exception raised for each clip, in input order
+    """
+    results = [audio if isinstance(audio, Exception) else {} for audio in audios]
+    use_fp16 = device == "cuda"
+    mels = []
+    batch_indices = []
+
+    for i, audio in enumerate(audios):
+        if isinstance(audio, Exception) or len(audio) > whisper.audio.N_SAMPLES:
+            continue
+
+        audio = whisper.pad_or_trim(audio)
+        mels.append(whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels))
+        batch_indices.append(i)
+
+    if mels:
+        mel = torch.stack(mels).to(model.device)
+        with torch.no_grad():
+            features = model.embed_audio(mel.half() if use_fp16 else mel)
+
+        for key, task in [("translation", "translate"), ("transcript", "transcribe")]:
+            options = whisper.DecodingOptions(
+                language="ja", task=task, temperature=0.0, fp16=use_fp16
+            )
+            # decode() skips the encoder when given its output
+            decoded = whisper.decode(model, features, options)
+
+            for i, result in zip(batch_indices, decoded):
+                if (
+                    result.no_speech_prob > NO_SPEECH_THRESHOLD
+                    and result.avg_logprob < LOGPROB_THRESHOLD
+                ):
+                    results[i][key] = ""
+                elif not needs_fallback(result):
+                    results[i][key] = result.text.strip()
+
+    for i, audio in enumerate(audios):
+        if isinstance(results[i], Exception):
+            continue
+
+        for key, task in [("translation", "translate"), ("transcript", "transcribe")]:
+            if key in results[i]:
+                continue
+            try:
+                result = model.transcribe(
+                    audio, language="ja", task=task, fp16=use_fp16
+                )
+            except Exception as e:
+                results[i] = e
+                break
+            results[i][key] = result["text"].strip()
+
+    return results
+
+
+def transcribe_files(audios, model, device):
+    """
+    Transcribe and translate clips one model.transcribe call at a time.
+
+    Returns: list with the English text or the exception raised for each clip
+    """
+    texts = [audio if isinstance(audio, Exception) else None for audio in audios]
+    transcribe_remaining(texts, audios, model, device)
+    return texts
+
+
+def transcribe_with_confidence(audio, model, device):
+    """
+    Transcribe and translate one clip with model.transcribe, keeping the
+    worst confidence figures over its segments.
+
+    Returns: (English text, {"avg_logprob", "no_speech_prob",
+    "compression_ratio"}), or (text, None) if there were no segments
+    """
+    use_fp16 = device == "cuda"
+    result = model.transcribe(audio, language="ja", task=TASK, fp16=use_fp16)
+    segments = result["segments"]
+
+    if not segments:
+        return result["text"].strip(), None
+
+    confidence = {
+        "avg_logprob": min(segment["avg_logprob"] for segment in segments),
+        "no_speech_prob": max(segment["no_speech_prob"] for segment in segments),
+        "compression_ratio": max(segment["compression_ratio"] for segment in segments),
+    }
+    return result["text"].strip(), confidence
 
+
+def escalation_reason(text, confidence, thresholds):
+    """
+    Check a --cascade small-model result against the thresholds.
+
+    Returns: why the clip should go to the larger model, or None to keep it
+    """
+    if not text or confidence is None:
+        return "no speech found"
+    if confidence["avg_logprob"] < thresholds["logprob"]:
+        return f"avg log-prob {confidence['avg_logprob']:.2f}"
+    if confidence["no_speech_prob"] > thresholds["no_speech"]:
+        return f"no-speech probability {confidence['no_speech_prob']:.2f}"
+    if confidence["compression_ratio"] > thresholds["compression_ratio"]:
+        return f"compression ratio {confidence['compression_ratio']:.2f}"
+    return None
+
+
+def pack_windows(durations):
+    """
+    Group short clips into windows that fit in Whisper's 30-second input.
+
+    Parameters:
+     - durations: Length of each clip in samples at 16 kHz
+
+    Returns: list of windows, each a list of (clip index, offset in samples)
+    """
+    gap = int(PACK_GAP_SECONDS * whisper.audio.SAMPLE_RATE)
+    windows = []
+    window = []
+    position = 0
+
+    for i, duration in enumerate(durations):
+        if window and position + duration > whisper.audio.N_SAMPLES:
+            windows.append(window)
+            window = []
+            position = 0
+
+        window.append((i, position))
+        position += duration + gap
+
+    if window:
+        windows.append(window)
+
+    return windows
+
+
+def split_segments(segments, spans):
+    """
+    Assign a packed window's segments back to the clips they came from.
+
+    Each clip owns the time from the middle of the gap before it to the middle
+    of the gap after it. A segment that doesn't fit inside one clip's share
+    can't be split cleanly, so every clip it touches is marked unsplit.
+
+    Parameters:
+     - segments: Segments from model.transcribe on the packed window
+     - spans: (start, end) of each clip in the window, in seconds
+
+    Returns: list with the joined text of each clip, or None if it's unsplit
+    """
+    half_gap = PACK_GAP_SECONDS / 2
+    bounds = [
+        (0.0 if k == 0 else start - half_gap, end + half_gap)
+        for k, (start, end) in enumerate(spans)
+    ]
+    bounds[-1] = (bounds[-1][0], float("inf"))
+
+    parts = [[] for _ in spans]
+    unsplit = set()
+
+    for segment in segments:
+        text = segment["text"].strip()
+        owners = [
+            k
+            for k, (low, high) in enumerate(bounds)
+            if segment["start"] < high and segment["end"] > low
+        ]
+
+        if len(owners) == 1:
+            if text:
+                parts[owners[0]].append(text)
+        else:
+            unsplit.update(owners)
+
+    return [None if k in unsplit else " ".join(parts[k]) for k in range(len(spans))]
+
+
+def transcribe_packed(audios, model, device):
+    """
+    Transcribe and translate short clips several at a time by joining them
+    into one 30-second window with silence between them.
+
+    Each window is transcribed once and its timestamped segments are split
+    back to the source clips. Clips longer than PACK_MAX_CLIP_SECONDS, and
+    clips whose segments can't be split cleanly, go through transcribe_file.
+
+    Parameters:
+     - audios: Clips from load_audio_or_error
+
+    Returns: list with the English text ("" if no speech) or the exception
+    raised for each clip, in input order
+    """
+    texts = [audio if isinstance(audio, Exception) else None for audio in audios]
+    short_clips = [
+        (i, audio)
+        for i, audio in enumerate(audios)
+        if texts[i] is None
+        and len(audio) <= PACK_MAX_CLIP_SECONDS * whisper.audio.SAMPLE_RATE
+    ]
+
+    windows = pack_windows([len(audio) for _, audio in short_clips])
+    use_fp16 = device == "cuda"
+    unsplit = 0
+
+    for window in windows:
+        packed = np.zeros(whisper.audio.N_SAMPLES, dtype=np.float32)
+        spans = []
+
+        for k, offset in window:
+            audio = short_clips[k][1]
+            packed[offset : offset + len(audio)] = audio
+            spans.append(
+                (
+                    offset / whisper.audio.SAMPLE_RATE,
+                    (offset + len(audio)) / whisper.audio.SAMPLE_RATE,
+                )
+            )
+
+        end = window[-1][1] + len(short_clips[window[-1][0]][1])
+
+        try:
+            # Clips are unrelated, so don't let one clip's text prompt the next
+            result = model.transcribe(
+                packed[:end],
+                language="ja",
+                task="translate",
+                fp16=use_fp16,
+                condition_on_previous_text=False,
+            )
+        except Exception:
+            continue
+
+        for (k, _), text in zip(window, split_segments(result["segments"], spans)):
+            if text is None:
+                unsplit += 1
+            texts[short_clips[k][0]] = text
+
+    print(
+        f"  Packed {len(short_clips)} clips into {len(windows)} windows"
+        f" ({unsplit} could not be split)"
+    )
+
+    transcribe_remaining(texts, audios, model, device)
+    return texts
+
+
+def transcribe_audio_files(
+    audio_files, model, device, batch_size=1, pack=False, bilingual=False
+):
+    """
+    Transcribe and translate voice files, printing each result.
+
+    Clips are decoded by a thread pool ahead of the model, so reading and
+    resampling overlap with inference.
+
+    Parameters:
+     - batch_size: Clips decoded together by transcribe_batch (1 = one
+       model.transcribe call per clip)
+     - pack: Join short clips into shared windows with transcribe_packed
+     - bilingual: Also transcribe the Japanese text, with transcribe_bilingual
+
+    Returns: list with the English text ("" if no speech) or the exception
+    raised for each file, in input order. With bilingual, each text is
+    {"translation", "transcript"} instead.
+    """
     if not audio_files:
         return []
 
+    if bilingual:
+        chunk_size = batch_size
+        transcribe = transcribe_bilingual
+    elif pack:
+        chunk_size = len(audio_files)
+        transcribe = transcribe_packed
+    elif batch_size > 1:
+        chunk_size = batch_size
+        transcribe = transcribe_batch
+    else:
+        chunk_size = 1
+        transcribe = transcribe_files
+
+    texts = []
+
+    with ThreadPoolExecutor(max_workers=PREFETCH_THREADS) as pool:
+        audios = pool.map(load_audio_or_error, audio_files)
+
+        for start in range(0, len(audio_files), chunk_size):
+            chunk = audio_files[start : start + chunk_size]
+            chunk_texts = transcribe(
+                list(itertools.islice(audios, len(chunk))), model, device
+            )
+
+            for i, (audio_file, text) in enumerate(zip(chunk, chunk_texts), start + 1):
+                print(f"  [{i}/{len(audio_files)}] {audio_file.name}")
+                report_result(text)
+
+            texts.extend(chunk_texts)
+
+    return texts
+
+
+def report_result(text):
+    """Print one file's result"""
+    if isinstance(text, Exception):
+        print(f"    Error: {text}")
+    elif isinstance(text, dict) and text["translation"]:
+        print(f"    JA: {text['transcript']}")
+        print(f"    EN: {text['translation']}")
+    elif text and not isinstance(text, dict):
+        print(f"    EN: {text}")
+    else:
+        print("    (no speech detected)")
+
+
+def cache_key(model_name, digest):
+    """Cache key for one clip's audio under a model and task"""
+    return f"{model_name}/{TASK}/{digest}"
+
+
+def load_cache(cache_file):
+    """
+    Load the transcription cache, or an empty one if it's missing or from an
+    older script version.
+
+    The cache has two tables:
+     - entries: cache key -> {"translation": text, "file": first file seen},
+       plus "transcript": Japanese text once a --bilingual run has seen the
+       clip, or "skipped": reason for clips the speech pre-filter skipped
+     - files: "Character/file.wav" -> audio hash _trans.txt was built from
+    """
+    empty = {"version": CACHE_VERSION, "entries": {}, "files": {}}
+    cache = load_json(cache_file, empty)
+
+    if cache.get("version") != CACHE_VERSION:
+        return empty
+    return cache
+
+
+def parse_transcription(trans_file):
+    """
+    Parse an existing _trans.txt.
+
+    Returns: (model named in the header or None, list of result dicts as
+    passed to write_transcription), empty if there's no file
+    """
+    model = None
     results = []
 
-    for i, audio_file in enumerate(audio_files, 1):
-        print(f"  [{i}/{len(audio_files)}] {audio_file.name}")
+    try:
+        with open(trans_file, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return model, results
 
-        try:
-            # Transcribe and translate to English
-            use_fp16 = device == "cuda"
-            result = model.transcribe(
-                str(audio_file), language="ja", task="translate", fp16=use_fp16
+    for line in lines:
+        if line.startswith("# Model: "):
+            model = line.removeprefix("# Model: ").strip()
+        elif line.startswith("#") or not line.strip():
+            continue
+        elif not line.startswith("  "):
+            results.append({"file": line.strip(), "translation": ""})
+        elif not results:
+            continue
+        elif line.startswith("  (skipped: "):
+            results[-1]["skipped"] = line.strip().removeprefix("(skipped: ")[:-1]
+        elif line.startswith("  JA: "):
+            results[-1]["transcript"] = line.removeprefix("  JA: ")
+        elif line.startswith("  Model: "):
+            results[-1]["model"] = line.removeprefix("  Model: ")
+        else:
+            results[-1]["translation"] = line.strip()
+
+    return model, results
+
+
+def read_transcription(trans_file, model_name=None):
+    """
+    Read an existing _trans.txt.
+
+    Returns: dict of file name -> translation, empty if there's no file or
+    its header names a model other than model_name. Files without a model
+    header predate it and are read as they are. Clips the speech pre-filter
+    skipped are left out.
+    """
+    model, results = parse_transcription(trans_file)
+    if model_name and model not in (None, model_name):
+        return {}
+    return {
+        item["file"]: item["translation"]
+        for item in results
+        if item["translation"] and not item.get("skipped")
+    }
+
+
+def write_transcription(char_dir, results, model=None):
+    """Write a character's _trans.txt atomically, returning its path"""
+    output_file = char_dir / "_trans.txt"
+    temp_file = output_file.with_suffix(".tmp")
+
+    with open(temp_file, "w", encoding="utf-8") as f:
+        f.write(f"# Voice Line Translations for {char_dir.name}\n")
+        f.write("# Generated automatically using OpenAI Whisper\n")
+        if model:
+            f.write(f"# Model: {model}\n")
+        f.write(f"# Total files: {len(results)}\n")
+        f.write("\n")
+
+        for item in results:
+            f.write(f"{item['file']}\n")
+            if item.get("skipped"):
+                f.write(f"  (skipped: {item['skipped']})\n")
+            else:
+                f.write(f"  {item['translation']}\n")
+                if item.get("transcript"):
+                    f.write(f"  JA: {item['transcript']}\n")
+                if item.get("model"):
+                    f.write(f"  Model: {item['model']}\n")
+            f.write("\n")
+
+    os.replace(temp_file, output_file)
+    return output_file
+
+
+def save_results(char_dir, results, model=None):
+    """Write a character's results to _trans.txt and report it"""
+    if results:
+        output_file = write_transcription(char_dir, results, model)
+        print(f"  ✓ Saved {len(results)} translations to {output_file}")
+    else:
+        print(f"  ⚠ No audio files found in {char_dir.name}")
+
+    print()
+
+
+def open_store(store_file):
+    """
+    Open the transcription store, creating it (or recreating it, if it's from
+    an older script version) as needed.
+
+    The store has two tables plus a full-text index:
+     - lines: one row per clip listed in a _trans.txt, with its
+       "Character/file.wav" path, character, duration in seconds, Japanese
+       transcript, translation, model and skip reason; indexed by character
+       and duration
+     - lines_fts: FTS5 index over file, translation and transcript, kept in
+       step with lines by triggers
+     - sources: _trans.txt size and mtime each character's rows came from
+    """
+    store = sqlite3.connect(store_file)
+
+    if store.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+        store.executescript("""
+            DROP TABLE IF EXISTS lines_fts;
+            DROP TABLE IF EXISTS lines;
+            DROP TABLE IF EXISTS sources;
+            """)
+
+    store.executescript(f"""
+        CREATE TABLE IF NOT EXISTS sources (
+            character TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS lines (
+            id INTEGER PRIMARY KEY,
+            file TEXT NOT NULL UNIQUE,
+            character TEXT NOT NULL,
+            duration REAL,
+            transcript TEXT,
+            translation TEXT NOT NULL,
+            model TEXT,
+            skipped TEXT
+        );
+        CREATE INDEX IF NOT EXISTS lines_character ON lines (character);
+        CREATE INDEX IF NOT EXISTS lines_duration ON lines (duration);
+        CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5 (
+            file, translation, transcript,
+            content=lines, content_rowid=id, tokenize="porter unicode61"
+        );
+        CREATE TRIGGER IF NOT EXISTS lines_insert AFTER INSERT ON lines BEGIN
+            INSERT INTO lines_fts (rowid, file, translation, transcript)
+            VALUES (new.id, new.file, new.translation, new.transcript);
+        END;
+        CREATE TRIGGER IF NOT EXISTS lines_delete AFTER DELETE ON lines BEGIN
+            INSERT INTO lines_fts (lines_fts, rowid, file, translation, transcript)
+            VALUES ('delete', old.id, old.file, old.translation, old.transcript);
+        END;
+        PRAGMA user_version = {STORE_VERSION};
+        """)
+    return store
+
+
+def audio_duration(audio_file):
+    """Length of a clip in seconds from its header, or None if unreadable"""
+    try:
+        return sf.info(str(audio_file)).duration
+    except (sf.LibsndfileError, OSError):
+        return None
+
+
+def update_store(store_file, character_dirs):
+    """
+    Bring the transcription store in line with every character's _trans.txt,
+    re-reading only the files that changed since the last update.
+
+    Returns: number of characters whose rows were replaced
+    """
+    updated = 0
+
+    with contextlib.closing(open_store(store_file)) as store, store:
+        known = {
+            character: (size, mtime_ns)
+            for character, size, mtime_ns in store.execute(
+                "SELECT character, size, mtime_ns FROM sources"
+            )
+        }
+        current = set()
+
+        for char_dir in character_dirs:
+            trans_file = char_dir / "_trans.txt"
+            try:
+                stat = trans_file.stat()
+            except OSError:
+                continue
+
+            current.add(char_dir.name)
+            if known.get(char_dir.name) == (stat.st_size, stat.st_mtime_ns):
+                continue
+
+            model, results = parse_transcription(trans_file)
+            store.execute("DELETE FROM lines WHERE character = ?", (char_dir.name,))
+            store.executemany(
+                "INSERT INTO lines (file, character, duration, transcript,"
+                " translation, model, skipped) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        f"{char_dir.name}/{item['file']}",
+                        char_dir.name,
+                        audio_duration(char_dir / item["file"]),
+                        item.get("transcript"),
+                        item["translation"],
+                        item.get("model") or model,
+                        item.get("skipped"),
+                    )
+                    for item in results
+                ],
             )
+            store.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?)",
+                (char_dir.name, stat.st_size, stat.st_mtime_ns),
+            )
+            updated += 1
+
+        for character in known.keys() - current:
+            store.execute("DELETE FROM lines WHERE character = ?", (character,))
+            store.execute("DELETE FROM sources WHERE character = ?", (character,))
+            updated += 1
+
+        line_count = store.execute("SELECT COUNT(*) FROM lines").fetchone()[0]
+
+    if updated:
+        print(
+            f"✓ Indexed {line_count} lines from {len(current)} character(s)"
+            f" in {store_file}"
+        )
+    return updated
+
+
+# Per-process state for --workers, set up once by _init_worker
+_worker_model = None
+_worker_device = None
+
+
+def _init_worker(model_name, device, threads, quantize):
+    """Pool initializer: split the CPU between workers and load the model once."""
+    global _worker_model, _worker_device
+
+    import_whisper()
+    torch.set_num_threads(threads)
+    _worker_device = device
+    _worker_model = load_whisper_model(model_name, device, quantize)
+
+
+def _transcribe_files_quietly(audio_files, options):
+    """
+    Worker for --workers: transcribe one character's files through
+    call_quietly.
+
+    Returns: (texts, captured log)
+    """
+    return call_quietly(
+        transcribe_audio_files, audio_files, _worker_model, _worker_device, **options
+    )
 
-            translation = result["text"].strip()
 
-            if translation:
-                results.append({"file": audio_file.name, "translation": translation})
-                print(f"    EN: {translation}")
+def _transcribe_in_workers(
+    jobs, model_name, device, workers, threads, options, quantize=None
+):
+    """
+    Transcribe jobs in a pool of worker processes.
+
+    Each worker loads the model once and takes whole jobs (one character's
+    files) from the pool's queue. Results are yielded as jobs finish.
+
+    Yields: (job, texts or None if its worker failed, the worker's captured log)
+    """
+    # Spawn rather than fork: forking a process that has loaded torch is unsafe
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_name, device, threads, quantize),
+    ) as pool:
+        futures = {
+            pool.submit(_transcribe_files_quietly, job[1], options): job for job in jobs
+        }
+
+        for future in as_completed(futures):
+            try:
+                texts, log = future.result()
+            except Exception as e:
+                texts, log = None, f"  Error: {e}\n"
+
+            yield futures[future], texts, log
+
+
+def cached_entry(cache, model_name, digest, vad, bilingual=False):
+    """
+    Look up a clip's cache entry. Pre-filter skips only count with vad on,
+    and with bilingual only entries that have the Japanese text count.
+    """
+    entry = cache["entries"].get(cache_key(model_name, digest))
+    if entry is None:
+        return None
+    if entry.get("skipped"):
+        return entry if vad else None
+    if bilingual and "transcript" not in entry:
+        return None
+    return entry
+
+
+def character_files(cache, char_dir):
+    """
+    The cache's record of the clips a character's _trans.txt was built from.
+
+    Returns: dict of "Character/file.wav" -> audio hash
+    """
+    prefix = f"{char_dir.name}/"
+    return {
+        path: digest
+        for path, digest in cache["files"].items()
+        if path.startswith(prefix)
+    }
+
+
+def plan_transcriptions(
+    character_dirs, cache, model_name, force, vad=True, bilingual=False
+):
+    """
+    Work out which clips need Whisper.
+
+    A clip's text is reused from the cache when its audio was transcribed
+    before by the same model, under any name or character. Failing that,
+    it's reused from the character's existing _trans.txt, unless the clip's
+    audio changed since that file was written or the file was written by
+    another model (bilingual runs need the Japanese text, so they only reuse
+    the cache). --force reuses nothing.
+    Each new piece of audio is transcribed once, even if several files have
+    it, and a clip reused from _trans.txt is seeded into the cache so its
+    copies reuse it too. With vad, new clips that fail the speech pre-filter
+    are recorded in the cache as skipped instead of being transcribed.
+
+    Returns: (plans, jobs)
+     - plans: (character dir, audio files, their hashes, existing
+       _trans.txt entries) for each directory whose _trans.txt needs rebuilding
+     - jobs: (character dir, files to transcribe, their hashes)
+    """
+    plans = []
+    jobs = []
+    claimed = set()
+    scanned = []
+
+    for char_dir in character_dirs:
+        trans_file = char_dir / "_trans.txt"
+        audio_files = find_audio_files(char_dir)
+        digests = [file_hash(f) for f in audio_files]
+        known = {} if force or bilingual else read_transcription(trans_file, model_name)
+        scanned.append((char_dir, trans_file, audio_files, digests, known))
+
+        # Seed the cache with _trans.txt lines whose audio is unchanged, so
+        # copies of the clip under other names or characters reuse them
+        for audio_file, digest in zip(audio_files, digests):
+            rel_path = f"{char_dir.name}/{audio_file.name}"
+            if audio_file.name in known and cache["files"].get(rel_path) == digest:
+                cache["entries"].setdefault(
+                    cache_key(model_name, digest),
+                    {"translation": known[audio_file.name], "file": rel_path},
+                )
+
+    for char_dir, trans_file, audio_files, digests, known in scanned:
+        # _trans.txt also needs rewriting when clips were added, changed or
+        # removed since it was written, even if every clip is in the cache
+        rel_paths = [f"{char_dir.name}/{f.name}" for f in audio_files]
+        listed = dict(zip(rel_paths, digests)) == character_files(cache, char_dir)
+
+        stale = []
+        for audio_file, digest, rel_path in zip(audio_files, digests, rel_paths):
+            if force:
+                stale.append((audio_file, digest))
+            elif cached_entry(cache, model_name, digest, vad, bilingual) is not None:
+                continue
+            elif audio_file.name in known and cache["files"].get(rel_path) in (
+                None,
+                digest,
+            ):
+                continue
             else:
-                print("    (no speech detected)")
+                stale.append((audio_file, digest))
 
-        except Exception as e:
-            print(f"    Error: {e}")
+        if not stale and listed and trans_file.exists():
+            print(f"Skipping {char_dir.name} (up to date)")
+            continue
 
-    return results
+        plans.append((char_dir, audio_files, digests, known))
 
+        new_files = []
+        new_digests = []
+        skipped = []
+        for audio_file, digest in stale:
+            if digest in claimed:
+                continue
+            claimed.add(digest)
 
-def process_voice_directories(voice_base_dir, model_name="large", force=False):
+            reason = vad_skip_reason(audio_file) if vad else None
+            if reason:
+                cache["entries"][cache_key(model_name, digest)] = {
+                    "translation": "",
+                    "skipped": reason,
+                    "file": f"{char_dir.name}/{audio_file.name}",
+                }
+                skipped.append((audio_file, reason))
+            else:
+                new_files.append(audio_file)
+                new_digests.append(digest)
+
+        if new_files:
+            jobs.append((char_dir, new_files, new_digests))
+
+        print(
+            f"{char_dir.name}: {len(new_files)} of {len(audio_files)} clips"
+            " need transcription"
+        )
+        for audio_file, reason in skipped:
+            print(f"  Skipped {audio_file.name} ({reason})")
+
+    return plans, jobs
+
+
+def process_voice_directories(
+    voice_base_dir,
+    model_name="large",
+    force=False,
+    batch_size=1,
+    pack=False,
+    workers=1,
+    vad=True,
+    socket_path=DEFAULT_SOCKET,
+    bilingual=False,
+    cascade=None,
+    cascade_thresholds=CASCADE_THRESHOLDS,
+    quantize=None,
+    store_file=DEFAULT_STORE,
+):
     """
-    Auto-detect character directories and transcribe those without _trans.txt files.
+    Auto-detect character directories and transcribe clips that aren't in
+    the transcription cache, then rebuild _trans.txt for every directory
+    that changed.
+
+    Parameters:
+     - force: Ignore the cache and existing _trans.txt files and transcribe
+       every clip again
+     - workers: Processes transcribing character directories in parallel,
+       each with its own copy of the model
+     - vad: Skip new clips with no speech energy before running Whisper
+     - socket_path: Where to look for a --serve worker to use instead of
+       loading the model here (None to always load it)
+     - bilingual: Also transcribe each clip's Japanese text into _trans.txt
+     - cascade: Smaller model to try first; clips whose results fall past
+       cascade_thresholds go on to model_name. Results are cached under
+       "<cascade>><model_name>" and _trans.txt notes which model produced
+       each line
+     - quantize: "int8" to quantize every model after loading it; results
+       are cached separately from the full-precision model's
+     - store_file: SQLite store every _trans.txt is indexed in for
+       search_voice_lines.py; the transcription cache is kept next to it
     """
     voice_base = Path(voice_base_dir)
 
@@ -72,72 +1142,565 @@ def process_voice_directories(voice_base_dir, model_name="large", force=False):
         sys.exit(1)
 
     # Find all character directories (subdirectories with audio files)
-    character_dirs = [d for d in voice_base.iterdir() if d.is_dir()]
+    character_dirs = sorted(d for d in voice_base.iterdir() if d.is_dir())
 
     if not character_dirs:
         print(f"No character directories found in '{voice_base_dir}'")
         sys.exit(1)
 
-    # Filter directories that need transcription
-    dirs_to_process = []
-    for char_dir in character_dirs:
-        trans_file = char_dir / "_trans.txt"
-        if force or not trans_file.exists():
-            dirs_to_process.append(char_dir)
-        else:
-            print(f"Skipping {char_dir.name} (already has _trans.txt)")
+    Path(store_file).parent.mkdir(parents=True, exist_ok=True)
+    cache_file = Path(store_file).parent / CACHE_NAME
+    cache = load_cache(cache_file)
+    cache_name = model_label(model_name, quantize)
+    if cascade:
+        cache_name = f"{model_label(cascade, quantize)}>{cache_name}"
+    plans, jobs = plan_transcriptions(
+        character_dirs, cache, cache_name, force, vad, bilingual
+    )
 
-    if not dirs_to_process:
-        print("\nAll characters already have transcription files!")
+    if not plans:
+        print("\nAll transcriptions are up to date!")
         print("Use --force to regenerate transcriptions.")
+        update_store(Path(store_file), character_dirs)
+        return
+
+    if jobs and cascade:
+        jobs = run_cascade(
+            jobs, cache, cache_file, cache_name, cascade, cascade_thresholds, quantize
+        )
+
+    if jobs:
+        options = {"batch_size": batch_size, "pack": pack, "bilingual": bilingual}
+        transcribe_jobs(
+            jobs,
+            cache,
+            cache_file,
+            model_name,
+            options,
+            workers,
+            socket_path,
+            cache_name if cascade else None,
+            quantize,
+        )
+
+    print(f"\n{'=' * 60}")
+    print(f"Writing {len(plans)} transcription file(s)")
+    print(f"{'=' * 60}\n")
+
+    for char_dir, audio_files, digests, known in plans:
+        results = []
+        for path in character_files(cache, char_dir):
+            del cache["files"][path]
+
+        for audio_file, digest in zip(audio_files, digests):
+            entry = cached_entry(cache, cache_name, digest, vad)
+
+            if entry and entry.get("skipped"):
+                results.append({"file": audio_file.name, "skipped": entry["skipped"]})
+            elif entry and entry["translation"]:
+                results.append(
+                    {
+                        "file": audio_file.name,
+                        "translation": entry["translation"],
+                        "transcript": entry.get("transcript"),
+                        "model": entry.get("model"),
+                    }
+                )
+            elif not entry and audio_file.name in known:
+                results.append(
+                    {"file": audio_file.name, "translation": known[audio_file.name]}
+                )
+            cache["files"][f"{char_dir.name}/{audio_file.name}"] = digest
+
+        print(f"{char_dir.name}:")
+        save_results(char_dir, results, cache_name)
+
+    save_json(cache_file, cache)
+    update_store(Path(store_file), character_dirs)
+
+    print(f"{'=' * 60}")
+    print("Done!")
+
+
+def transcribe_jobs(
+    jobs,
+    cache,
+    cache_file,
+    model_name,
+    options,
+    workers=1,
+    socket_path=None,
+    cache_name=None,
+    quantize=None,
+):
+    """
+    Load Whisper and transcribe each job's files, adding the results to the
+    cache. The cache is saved after every job, so an interrupted run keeps
+    what it finished.
+
+    If a --serve worker with the same model is listening on socket_path, the
+    jobs are sent to it instead and no model is loaded here.
+
+    Parameters:
+     - options: Keyword arguments for transcribe_audio_files
+     - cache_name: Model name the results are cached under, if it isn't
+       model_name (--cascade); entries then record model_name as the model
+       that produced them
+     - quantize: "int8" to quantize the model after loading it
+    """
+    label = model_label(model_name, quantize)
+    produced_by = label if cache_name else None
+    cache_name = cache_name or label
+
+    if socket_path is not None and use_worker(socket_path, label):
+        clip_count = sum(len(files) for _, files, _ in jobs)
+        print(f"\nUsing the transcription worker at {socket_path}")
+        print(f"\n{'=' * 60}")
+        print(f"Transcribing {clip_count} clip(s) for {len(jobs)} character(s)")
+        print(f"{'=' * 60}\n")
+
+        for idx, job in enumerate(jobs, 1):
+            print(f"[{idx}/{len(jobs)}] Processing {job[0].name}...")
+            texts = transcribe_with_worker(socket_path, job[1], options)
+            cache_results(cache, cache_file, cache_name, job, texts, produced_by)
         return
 
     # Initialize model once
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    print(f"\nUsing device: {device}")
-    if device == "cuda":
-        print(f"GPU: {torch.cuda.get_device_name(0)}")
+    import_whisper()
+    device = select_device(quantize)
 
-    print(f"\nLoading Whisper model: {model_name}")
+    print(f"\nLoading Whisper model: {label}")
     print("(First run will download the model)")
     print(
         "Model sizes: tiny (~75MB), base (~150MB), small (~500MB), medium (~1.5GB), large (~3GB)"
     )
-    model = whisper.load_model(model_name, device=device)
 
+    if workers > 1:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"Starting {workers} workers with {threads} torch threads each")
+    else:
+        model = load_whisper_model(model_name, device, quantize)
+
+    clip_count = sum(len(files) for _, files, _ in jobs)
     print(f"\n{'=' * 60}")
-    print(f"Processing {len(dirs_to_process)} character(s)")
+    print(f"Transcribing {clip_count} clip(s) for {len(jobs)} character(s)")
     print(f"{'=' * 60}\n")
 
-    # Process each character directory
-    for idx, char_dir in enumerate(dirs_to_process, 1):
-        print(f"[{idx}/{len(dirs_to_process)}] Processing {char_dir.name}...")
+    if workers > 1:
+        for idx, (job, texts, log) in enumerate(
+            _transcribe_in_workers(
+                jobs, model_name, device, workers, threads, options, quantize
+            ),
+            1,
+        ):
+            print(f"[{idx}/{len(jobs)}] Processed {job[0].name}")
+            print(log, end="")
+            cache_results(cache, cache_file, cache_name, job, texts, produced_by)
+    else:
+        for idx, job in enumerate(jobs, 1):
+            print(f"[{idx}/{len(jobs)}] Processing {job[0].name}...")
+            texts = transcribe_audio_files(job[1], model, device, **options)
+            cache_results(cache, cache_file, cache_name, job, texts, produced_by)
+
 
-        results = transcribe_character_dir(char_dir, model, device)
+def run_cascade(
+    jobs, cache, cache_file, cache_name, model_name, thresholds, quantize=None
+):
+    """
+    First stage of --cascade: transcribe every job's clips with a small
+    model and cache the confident results.
+
+    Returns: jobs holding only the clips to send on to the larger model
+    """
+    import_whisper()
+    device = select_device(quantize)
+    label = model_label(model_name, quantize)
+
+    print(f"\nLoading Whisper model: {label} (cascade first stage)")
+    model = load_whisper_model(model_name, device, quantize)
+
+    clip_count = sum(len(files) for _, files, _ in jobs)
+    print(f"\n{'=' * 60}")
+    print(f"Transcribing {clip_count} clip(s) with {model_name} first")
+    print(f"{'=' * 60}\n")
+
+    escalated_jobs = []
+    escalated_count = 0
+
+    for idx, (char_dir, audio_files, digests) in enumerate(jobs, 1):
+        print(f"[{idx}/{len(jobs)}] Processing {char_dir.name}...")
+        kept = ([], [], [])
+        escalated = ([], [])
+
+        with ThreadPoolExecutor(max_workers=PREFETCH_THREADS) as pool:
+            audios = pool.map(load_audio_or_error, audio_files)
+
+            for i, (audio_file, digest, audio) in enumerate(
+                zip(audio_files, digests, audios), 1
+            ):
+                print(f"  [{i}/{len(audio_files)}] {audio_file.name}")
+
+                try:
+                    if isinstance(audio, Exception):
+                        raise audio
+                    text, confidence = transcribe_with_confidence(audio, model, device)
+                except Exception as e:
+                    report_result(e)
+                    continue
+
+                reason = escalation_reason(text, confidence, thresholds)
+                if reason:
+                    print(f"    -> escalated ({reason})")
+                    escalated[0].append(audio_file)
+                    escalated[1].append(digest)
+                else:
+                    report_result(text)
+                    kept[0].append(audio_file)
+                    kept[1].append(digest)
+                    kept[2].append(text)
+
+        cache_results(
+            cache,
+            cache_file,
+            cache_name,
+            (char_dir, kept[0], kept[1]),
+            kept[2],
+            label,
+        )
+
+        if escalated[0]:
+            escalated_jobs.append((char_dir, *escalated))
+            escalated_count += len(escalated[0])
+
+    print(
+        f"{label} kept {clip_count - escalated_count} of {clip_count} clip(s),"
+        f" {escalated_count} escalated"
+    )
+    return escalated_jobs
+
+
+def cache_results(cache, cache_file, model_name, job, texts, produced_by=None):
+    """
+    Add a finished job's results to the cache and save it. Errors aren't
+    cached. produced_by, if given, is recorded as each entry's "model".
+    """
+    char_dir, audio_files, digests = job
+
+    if texts is not None:
+        for audio_file, digest, text in zip(audio_files, digests, texts):
+            if isinstance(text, Exception):
+                continue
+
+            entry = {"file": f"{char_dir.name}/{audio_file.name}"}
+            entry.update(text if isinstance(text, dict) else {"translation": text})
+            if produced_by:
+                entry["model"] = produced_by
+            cache["entries"][cache_key(model_name, digest)] = entry
+
+        save_json(cache_file, cache)
+
+    print()
+
+
+class TranscriptionServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Unix socket server holding one loaded model.
+
+    Connections are handled on their own threads so pings are answered while
+    a job runs, but only one job uses the model at a time.
+    """
 
-        if results:
-            # Write to _trans.txt in the character directory
-            output_file = char_dir / "_trans.txt"
+    daemon_threads = True
 
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(f"# Voice Line Translations for {char_dir.name}\n")
-                f.write("# Generated automatically using OpenAI Whisper\n")
-                f.write(f"# Total files: {len(results)}\n")
-                f.write("\n")
+    def __init__(self, socket_path, model, device, model_name, options):
+        super().__init__(str(socket_path), TranscriptionRequestHandler)
+        self.model = model
+        self.device = device
+        self.model_name = model_name
+        self.options = options
+        self.lock = threading.Lock()
 
-                for item in results:
-                    f.write(f"{item['file']}\n")
-                    f.write(f"  {item['translation']}\n")
-                    f.write("\n")
+    def dispatch(self, request):
+        """
+        Handle one decoded request.
 
-            print(f"  ✓ Saved {len(results)} translations to {output_file}")
+        Requests:
+         - {"op": "ping"}
+         - {"op": "transcribe", "paths": [file or character directory, ...],
+           "options": {...}}, where options override the worker's own
+           transcribe_audio_files arguments and may be left out
+
+        Returns: response dict. Every response has "model"; transcribe
+        responses add "results", a list of {"path", "text"} (plus
+        "transcript" with bilingual) or {"path", "error"} in request order
+        """
+        response = {"model": self.model_name}
+        op = request.get("op")
+
+        if op == "ping":
+            return response
+        if op != "transcribe":
+            raise ValueError(f"Unknown op: {op!r}")
+
+        audio_files = []
+        for path in map(Path, request.get("paths", [])):
+            audio_files.extend(find_audio_files(path) if path.is_dir() else [path])
+
+        options = {**self.options, **request.get("options", {})}
+        unknown = options.keys() - self.options.keys()
+        if unknown:
+            raise ValueError(f"Unknown options: {', '.join(sorted(unknown))}")
+
+        with self.lock:
+            texts = transcribe_audio_files(
+                audio_files, self.model, self.device, **options
+            )
+
+        results = []
+        for audio_file, text in zip(audio_files, texts):
+            if isinstance(text, Exception):
+                results.append({"path": str(audio_file), "error": str(text)})
+            elif isinstance(text, dict):
+                results.append(
+                    {
+                        "path": str(audio_file),
+                        "text": text["translation"],
+                        "transcript": text["transcript"],
+                    }
+                )
+            else:
+                results.append({"path": str(audio_file), "text": text})
+
+        response["results"] = results
+        return response
+
+
+class TranscriptionRequestHandler(socketserver.StreamRequestHandler):
+    """Answer newline-delimited JSON requests, one JSON response line each"""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.dispatch(json.loads(line))
+            except Exception as e:
+                response = {"model": self.server.model_name, "error": str(e)}
+
+            self.wfile.write(
+                (json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8")
+            )
+            self.wfile.flush()
+
+
+def request_worker(socket_path, request, timeout=None):
+    """
+    Send one request to a --serve worker and wait for its response.
+
+    Only sockets owned by this user are trusted, so another local user can't
+    stand in for the worker and hand back made-up transcripts.
+
+    Raises: OSError if no worker is listening, PermissionError if the socket
+    belongs to another user
+    """
+    if Path(socket_path).stat().st_uid != os.getuid():
+        raise PermissionError(f"{socket_path} belongs to another user")
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+
+        with sock.makefile("r", encoding="utf-8") as f:
+            line = f.readline()
+
+    if not line:
+        raise ConnectionError("Worker closed the connection")
+    return json.loads(line)
+
+
+def use_worker(socket_path, model_name):
+    """Check whether a live --serve worker with model_name is on socket_path"""
+    try:
+        response = request_worker(socket_path, {"op": "ping"}, timeout=2)
+    except PermissionError as e:
+        print(f"\nWarning: not using the worker at {socket_path}: {e}")
+        return False
+    except (OSError, ValueError):
+        return False
+
+    if response.get("model") != model_name:
+        print(
+            f"\nThe worker at {socket_path} serves the {response.get('model')}"
+            f" model, not {model_name}; loading the model here instead"
+        )
+        return False
+    return True
+
+
+def transcribe_with_worker(socket_path, audio_files, options):
+    """
+    Transcribe files on a --serve worker, printing each result.
+
+    Returns: list with the English text ("" if no speech) or an exception for
+    each file, like transcribe_audio_files. None if the request failed.
+    """
+    paths = [str(Path(audio_file).resolve()) for audio_file in audio_files]
+
+    try:
+        response = request_worker(
+            socket_path, {"op": "transcribe", "paths": paths, "options": options}
+        )
+    except (OSError, ValueError) as e:
+        print(f"  Error: worker request failed: {e}")
+        return None
+
+    if "error" in response:
+        print(f"  Error: {response['error']}")
+        return None
+
+    texts = []
+    for i, (audio_file, result) in enumerate(zip(audio_files, response["results"]), 1):
+        if "error" in result:
+            text = RuntimeError(result["error"])
+        elif "transcript" in result:
+            text = {"translation": result["text"], "transcript": result["transcript"]}
         else:
-            print(f"  ⚠ No audio files found in {char_dir.name}")
+            text = result["text"]
+        print(f"  [{i}/{len(audio_files)}] {Path(audio_file).name}")
+        report_result(text)
+        texts.append(text)
 
-        print()
+    return texts
 
-    print(f"{'=' * 60}")
-    print("Done!")
+
+def serve(socket_path, model_name="large", quantize=None, **options):
+    """
+    Load the model once and answer transcription requests on a Unix socket
+    until interrupted.
+
+    Parameters:
+     - quantize: "int8" to quantize the model after loading it
+     - options: Default keyword arguments for transcribe_audio_files
+    """
+    socket_path = Path(socket_path)
+    socket_dir = socket_path.parent
+    socket_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    # Anyone who can reach the socket can make the worker read files, so
+    # only serve from a real directory nobody else can get into
+    dir_stat = socket_dir.lstat()
+    if (
+        stat.S_ISLNK(dir_stat.st_mode)
+        or dir_stat.st_uid != os.getuid()
+        or stat.S_IMODE(dir_stat.st_mode) != 0o700
+    ):
+        print(
+            f"Error: {socket_dir} must be a directory owned by you with mode 700,"
+            " not a symlink; pick a --socket in a private directory"
+        )
+        sys.exit(1)
+
+    if socket_path.exists():
+        try:
+            request_worker(socket_path, {"op": "ping"}, timeout=2)
+        except PermissionError as e:
+            print(f"Error: can't serve on {socket_path}: {e}")
+            sys.exit(1)
+        except (OSError, ValueError):
+            # Left behind by a worker that didn't shut down cleanly
+            socket_path.unlink()
+        else:
+            print(f"Error: a worker is already listening on {socket_path}")
+            sys.exit(1)
+
+    import_whisper()
+    device = select_device(quantize)
+    label = model_label(model_name, quantize)
+    print(f"Loading Whisper model: {label}")
+    model = load_whisper_model(model_name, device, quantize)
+
+    with TranscriptionServer(socket_path, model, device, label, options) as server:
+        print(f"\n✓ Listening on {socket_path} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopping worker")
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+
+def sample_clips(voice_base, sample_size):
+    """
+    Pick a fixed, evenly spread sample of clips across every character, so
+    repeated checks compare the same files.
+    """
+    audio_files = [
+        audio_file
+        for char_dir in sorted(d for d in voice_base.iterdir() if d.is_dir())
+        for audio_file in find_audio_files(char_dir)
+    ]
+    step = max(1, len(audio_files) // sample_size)
+    return audio_files[::step][:sample_size]
+
+
+def check_quantization(voice_base_dir, model_name="large", quantize="int8", **options):
+    """
+    Compare a quantized model's translations with the full-precision model's
+    on a fixed sample of clips, both on the CPU.
+
+    Returns: True if the mean similarity (difflib ratio) is at least
+    QUANTIZE_MIN_SIMILARITY
+    """
+    import_whisper()
+    audio_files = sample_clips(Path(voice_base_dir), QUANTIZE_SAMPLE_SIZE)
+    print(f"Comparing {model_name} fp32 and {quantize} on {len(audio_files)} clips")
+
+    runs = {}
+    for label, mode in [("fp32", None), (quantize, quantize)]:
+        print(f"\nLoading Whisper model: {model_label(model_name, mode)}")
+        model = load_whisper_model(model_name, "cpu", mode)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            texts = transcribe_audio_files(audio_files, model, "cpu", **options)
+        elapsed = time.perf_counter() - start
+
+        del model
+        runs[label] = texts
+        print(f"  {elapsed:.1f} s ({len(audio_files) / elapsed:.2f} clips/s)")
+
+    print(f"\n{'=' * 60}")
+    similarities = []
+
+    for audio_file, expected, actual in zip(audio_files, runs["fp32"], runs[quantize]):
+        if isinstance(expected, Exception) or isinstance(actual, Exception):
+            print(
+                f"  ❌ {audio_file.parent.name}/{audio_file.name}: failed to transcribe"
+            )
+            continue
+
+        similarity = difflib.SequenceMatcher(None, expected, actual).ratio()
+        similarities.append(similarity)
+
+        marker = "  " if similarity == 1 else "≈ "
+        print(f"  {marker}{similarity:5.0%} {audio_file.parent.name}/{audio_file.name}")
+        if similarity < 1:
+            print(f"         fp32: {expected}")
+            print(f"         {quantize}: {actual}")
+
+    if not similarities:
+        print("❌ No clips could be compared")
+        return False
+
+    mean = sum(similarities) / len(similarities)
+    identical = sum(similarity == 1 for similarity in similarities)
+    print(f"\nIdentical: {identical}/{len(similarities)}, mean similarity: {mean:.1%}")
+
+    if mean < QUANTIZE_MIN_SIMILARITY:
+        print(f"❌ {quantize} is below {QUANTIZE_MIN_SIMILARITY:.0%} similarity")
+        return False
+
+    print(f"✓ {quantize} stays within {QUANTIZE_MIN_SIMILARITY:.0%} similarity")
+    return True
 
 
 if __name__ == "__main__":
@@ -145,7 +1708,8 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(
         description="Transcribe and translate Japanese voice files to English.\n"
-        "Auto-detects character directories and only transcribes those without _trans.txt files.",
+        "Auto-detects character directories and only transcribes clips that aren't in\n"
+        f"the transcription cache ({CACHE_NAME}, next to --store).",
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
     parser.add_argument(
@@ -153,18 +1717,168 @@ if __name__ == "__main__":
         default="mod/sounds/voice",
         help="Base voice directory containing character folders (default: mod/sounds/voice)",
     )
+    parser.add_argument(
+        "--store",
+        default=str(DEFAULT_STORE),
+        help=f"SQLite store to index transcriptions in for search_voice_lines.py"
+        f" (default: {DEFAULT_STORE})",
+    )
     parser.add_argument(
         "--model",
-        choices=["tiny", "base", "small", "medium", "large"],
+        choices=MODEL_SIZES,
         default="large",
         help="Whisper model size (default: large)",
     )
     parser.add_argument(
         "--force",
         action="store_true",
-        help="Force regeneration of all transcriptions, even if _trans.txt exists",
+        help="Transcribe every clip again, ignoring the cache and existing"
+        " _trans.txt files",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Decode N clips per Whisper pass; clips over 30 s still go one at a time"
+        " (default: 1)",
+    )
+    parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="Join short clips into shared 30 s windows and split the result"
+        " by timestamp",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Transcribe N character directories in parallel processes, each"
+        " loading its own model (default: 1)",
+    )
+
+    parser.add_argument(
+        "--cascade",
+        choices=MODEL_SIZES[:-1],
+        help="Transcribe with this smaller model first and only send clips it"
+        " isn't confident about to --model",
+    )
+    parser.add_argument(
+        "--cascade-logprob",
+        type=float,
+        default=CASCADE_THRESHOLDS["logprob"],
+        help="Escalate clips with a segment below this average log-prob"
+        f" (default: {CASCADE_THRESHOLDS['logprob']})",
+    )
+    parser.add_argument(
+        "--cascade-no-speech",
+        type=float,
+        default=CASCADE_THRESHOLDS["no_speech"],
+        help="Escalate clips with a segment above this no-speech probability"
+        f" (default: {CASCADE_THRESHOLDS['no_speech']})",
+    )
+    parser.add_argument(
+        "--cascade-compression",
+        type=float,
+        default=CASCADE_THRESHOLDS["compression_ratio"],
+        help="Escalate clips with a segment above this compression ratio"
+        f" (default: {CASCADE_THRESHOLDS['compression_ratio']})",
+    )
+    parser.add_argument(
+        "--quantize",
+        choices=["int8"],
+        help="Apply dynamic quantization to the model's linear layers (CPU only)",
+    )
+    parser.add_argument(
+        "--check-quantize",
+        action="store_true",
+        help=f"Compare fp32 and --quantize (default int8) translations on"
+        f" {QUANTIZE_SAMPLE_SIZE} fixed clips and exit",
+    )
+    parser.add_argument(
+        "--bilingual",
+        action="store_true",
+        help="Also write each clip's Japanese text, decoded from the same"
+        " encoder pass as the translation",
+    )
+    parser.add_argument(
+        "--no-vad",
+        action="store_true",
+        help="Send every clip to Whisper, even ones the speech pre-filter would skip",
+    )
+
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep the model loaded and serve transcription requests on --socket;"
+        " later runs with the same --model use it",
+    )
+    parser.add_argument(
+        "--socket",
+        default=str(DEFAULT_SOCKET),
+        help="Unix socket for the --serve worker, in a mode 700 directory of"
+        f" yours (default: {DEFAULT_SOCKET})",
+    )
+    parser.add_argument(
+        "--no-worker",
+        action="store_true",
+        help="Always load the model here, even if a --serve worker is running",
     )
 
     args = parser.parse_args()
 
-    process_voice_directories(args.voice_dir, args.model, args.force)
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.pack and args.batch_size > 1:
+        parser.error("--pack cannot be combined with --batch-size")
+    if args.pack and args.bilingual:
+        parser.error("--pack cannot be combined with --bilingual")
+    if args.cascade and args.bilingual:
+        parser.error("--cascade cannot be combined with --bilingual")
+    if args.cascade and MODEL_SIZES.index(args.cascade) >= MODEL_SIZES.index(
+        args.model
+    ):
+        parser.error("--cascade must be a smaller model than --model")
+
+    if args.check_quantize:
+        ok = check_quantization(
+            args.voice_dir,
+            args.model,
+            args.quantize or "int8",
+            batch_size=args.batch_size,
+            pack=args.pack,
+        )
+        sys.exit(0 if ok else 1)
+
+    if args.serve:
+        serve(
+            args.socket,
+            args.model,
+            args.quantize,
+            batch_size=args.batch_size,
+            pack=args.pack,
+            bilingual=args.bilingual,
+        )
+        sys.exit(0)
+
+    process_voice_directories(
+        args.voice_dir,
+        args.model,
+        args.force,
+        args.batch_size,
+        args.pack,
+        args.workers,
+        not args.no_vad,
+        None if args.no_worker else args.socket,
+        args.bilingual,
+        args.cascade,
+        {
+            "logprob": args.cascade_logprob,
+            "no_speech": args.cascade_no_speech,
+            "compression_ratio": args.cascade_compression,
+        },
+        args.quantize,
+        args.store,
+    )
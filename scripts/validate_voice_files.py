@@ -1,10 +1,60 @@
 #!/usr/bin/env python3
 """Validate that all voice files referenced in XML actually exist"""
 
-import re
+import argparse
+import hashlib
+import json
+import os
+import subprocess
 import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from mod_graph import ModGraph
+from script_utils import VOICE_SAMPLE_RATES, file_hash, load_json, save_json
+
+VOICE_PREFIX = "data/sounds/voice/"
+MOD_DIR = Path("mod")
+
+# Results of earlier runs, reused for XML files whose inputs haven't changed
+CACHE_FILE = Path(".validate_voice_cache.json")
+
+# Keys of a diagnostic, in the order --format json prints them. The cache
+# stores diagnostics with sorted keys, so output is put back in this order.
+DIAGNOSTIC_FIELDS = ("file", "line", "column", "severity", "code", "message")
+
+# Audio policy, checked from WAV headers alone. Clips that break it get a
+# full peak and clipping scan.
+CHANNELS = 1
+
+# Longest clip (seconds) a Sound ID may play. Barks that cut into the action
+# must stay short; mission events can run long; everything else gets the
+# default.
+DEFAULT_MAX_SECONDS = 6.0
+BARK_MAX_SECONDS = 3.0
+EVENT_MAX_SECONDS = 20.0
+BARK_SOUND_IDS = {
+    "VOX_DYING",
+    "VOX_INJURED",
+    "VOX_TRPR_PINNED_DOWN",
+    "VOX_WARN_GRENADE",
+    "VOX_WARN_RPG",
+}
+EVENT_SOUND_IDS = {
+    "VOX_TRPR_CIV_DOWN",
+    "VOX_TRPR_CLEAR",
+    "VOX_TRPR_DONE_HERE",
+    "VOX_TRPR_EVAC",
+    "VOX_TRPR_HOST_DOWN",
+    "VOX_TRPR_MANDOWN",
+    "VOX_TRPR_TARGET_SEC",
+    "VOX_TRPR_VIP_DEAD",
+}
+
+# Samples at or above this magnitude count as clipped (about -0.01 dBFS)
+CLIP_LEVEL = 0.999
+
 # All valid sound IDs
 VALID_SOUND_IDS = {
     "VOX_DYING",
@@ -74,116 +124,598 @@ VALID_SOUND_IDS = {
 }
 
 
-def validate_voice_xml(xml_file):
-    """Check if all voice files referenced in an XML file exist and validate structure"""
-    print(f"\nValidating {xml_file}...")
+def list_voice_files(voice_dir):
+    """
+    List every file under the voice directory in one os.scandir walk.
+
+    Returns: set of "data/sounds/voice/..." paths, as the XML refers to them
+    """
+    existing = set()
+    pending = [(voice_dir, VOICE_PREFIX)]
+
+    while pending:
+        directory, prefix = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        pending.append((entry.path, f"{prefix}{entry.name}/"))
+                    else:
+                        existing.add(f"{prefix}{entry.name}")
+        except FileNotFoundError:
+            continue
+
+    return existing
+
+
+def diagnostic(graph, xml_file, element, code, message, severity="error"):
+    """
+    Describe one problem at an element's start tag.
+
+    Returns: dict with file, line, column, severity, code and message
+    """
+    line, column = graph.files[xml_file].location(element)
+    return {
+        "file": (graph.mod_dir / xml_file).as_posix(),
+        "line": line,
+        "column": column,
+        "severity": severity,
+        "code": code,
+        "message": message,
+    }
+
+
+def format_location(problem):
+    """file:line:column, the form editors and terminals link to"""
+    return f"{problem['file']}:{problem['line']}:{problem['column']}"
+
 
-    with open(xml_file, "r") as f:
-        content = f.read()
+def validate_voice_xml(graph, xml_file, existing):
+    """
+    Check if all voice files referenced in an XML file exist and validate structure
 
-    # Find all voice packs
-    pack_pattern = r'<Pack name="([^"]+)-Voice"[^>]*>(.*?)</Pack>'
-    packs = re.finditer(pack_pattern, content, re.DOTALL)
+    Parameters:
+     - existing: Voice file paths on disk, from list_voice_files
 
-    all_valid = True
+    Returns: (list of diagnostics, report text)
+    """
+    lines = []
+    log = lines.append
+    log(f"\nValidating {graph.mod_dir / xml_file}...")
 
-    for pack_match in packs:
-        pack_name = pack_match.group(1)
-        pack_content = pack_match.group(2)
+    packs = graph.definitions(kind="pack", file=xml_file)
+    problems = []
 
-        print(f"\n  Pack: {pack_name}-Voice")
+    for pack in packs:
+        pack_name = pack.key[1]
+        if not pack_name.endswith("-Voice"):
+            continue
+
+        log(f"\n  Pack: {pack_name}")
 
         # Find all sound IDs in this pack
-        sound_ids = re.findall(r'<Sound ID="([^"]+)">', pack_content)
+        sounds = list(pack.element.iter("Sound"))
+        counts = Counter(sound.get("ID") for sound in sounds)
 
         # Check for invalid sound IDs
-        invalid_ids = set(sound_ids) - VALID_SOUND_IDS
-        if invalid_ids:
-            print(f"    ❌ Found {len(invalid_ids)} invalid sound IDs:")
-            for sid in sorted(invalid_ids):
-                print(f"      - {sid}")
-            all_valid = False
+        invalid = [
+            diagnostic(
+                graph, xml_file, sound, "invalid-id", f"{pack_name}: {sound.get('ID')}"
+            )
+            for sound in sounds
+            if sound.get("ID") not in VALID_SOUND_IDS
+        ]
+        if invalid:
+            log(f"    ❌ Found {len(invalid)} invalid sound IDs:")
+            for problem in invalid:
+                log(f"      - {problem['message']} at {format_location(problem)}")
 
         # Check for missing sound IDs
-        missing_ids = VALID_SOUND_IDS - set(sound_ids)
-        if missing_ids:
-            print(f"    ❌ Missing {len(missing_ids)} required sound IDs:")
-            for sid in sorted(missing_ids):
-                print(f"      - {sid}")
-            all_valid = False
-
-        # Check for duplicate sound IDs
-        duplicates = [sid for sid in set(sound_ids) if sound_ids.count(sid) > 1]
+        missing = [
+            diagnostic(
+                graph, xml_file, pack.element, "missing-id", f"{pack_name}: {sid}"
+            )
+            for sid in sorted(VALID_SOUND_IDS - counts.keys())
+        ]
+        if missing:
+            log(f"    ❌ Missing {len(missing)} required sound IDs:")
+            for problem in missing:
+                log(f"      - {problem['message']} at {format_location(problem)}")
+
+        # Check for duplicate sound IDs, pointing at every repeat after the first
+        duplicates = []
+        seen = set()
+        for sound in sounds:
+            sid = sound.get("ID")
+            if sid in seen:
+                duplicates.append(
+                    diagnostic(
+                        graph,
+                        xml_file,
+                        sound,
+                        "duplicate-id",
+                        f"{pack_name}: {sid} (appears {counts[sid]} times)",
+                    )
+                )
+            seen.add(sid)
         if duplicates:
-            print(f"    ❌ Found {len(duplicates)} duplicate sound IDs:")
-            for sid in sorted(duplicates):
-                print(f"      - {sid} (appears {sound_ids.count(sid)} times)")
-            all_valid = False
+            log(f"    ❌ Found {len(duplicates)} duplicate sound IDs:")
+            for problem in duplicates:
+                log(f"      - {problem['message']} at {format_location(problem)}")
 
-        if not invalid_ids and not missing_ids and not duplicates:
-            print(f"    ✓ All {len(sound_ids)} sound IDs are valid and complete")
+        if not invalid and not missing and not duplicates:
+            log(f"    ✓ All {len(sounds)} sound IDs are valid and complete")
 
-    # Check that all referenced files exist
-    paths = re.findall(r'name="(data/sounds/voice/[^"]+)"', content)
+        problems.extend(invalid + missing + duplicates)
 
-    missing_files = []
+    # Check that all referenced files exist
     long_paths = []
+    missing_files = []
     checked = set()
 
-    for path in paths:
-        if path in checked:
-            continue
-        checked.add(path)
-
-        # Check path length (124 character limit)
-        if len(path) > 124:
-            long_paths.append((path, len(path)))
+    for pack in packs:
+        for element in pack.element.iter("Path"):
+            path = element.get("name", "")
+            if not path.startswith(VOICE_PREFIX) or path in checked:
+                continue
+            checked.add(path)
 
-        # Convert data/sounds/voice/X to mod/sounds/voice/X
-        local_path = path.replace("data/", "mod/")
+            # Check path length (124 character limit)
+            if len(path) > 124:
+                long_paths.append(
+                    diagnostic(
+                        graph,
+                        xml_file,
+                        element,
+                        "long-path",
+                        f"{path} (length: {len(path)} chars,"
+                        f" exceeds limit by {len(path) - 124})",
+                    )
+                )
 
-        if not Path(local_path).exists():
-            missing_files.append((path, local_path))
+            if path not in existing:
+                # Convert data/sounds/voice/X to mod/sounds/voice/X
+                missing_files.append(
+                    diagnostic(
+                        graph,
+                        xml_file,
+                        element,
+                        "missing-file",
+                        f"{path} (expected at: {graph.asset_file(path)})",
+                    )
+                )
 
     if long_paths:
-        print(
-            f"\n  ❌ Found {len(long_paths)} file paths exceeding 124 character limit:"
-        )
-        for path, length in long_paths:
-            print(f"    - {path}")
-            print(f"      (length: {length} chars, exceeds limit by {length - 124})")
-        all_valid = False
+        log(f"\n  ❌ Found {len(long_paths)} file paths exceeding 124 character limit:")
+        for problem in long_paths:
+            log(f"    - {problem['message']}")
+            log(f"      at {format_location(problem)}")
 
     if missing_files:
-        print(f"\n  ❌ Found {len(missing_files)} missing voice files:")
-        for xml_path, local_path in missing_files:
-            print(f"    - {xml_path}")
-            print(f"      (expected at: {local_path})")
-        all_valid = False
+        log(f"\n  ❌ Found {len(missing_files)} missing voice files:")
+        for problem in missing_files:
+            log(f"    - {problem['message']}")
+            log(f"      at {format_location(problem)}")
     else:
-        print(f"\n  ✓ All {len(checked)} referenced voice files exist")
+        log(f"\n  ✓ All {len(checked)} referenced voice files exist")
 
-    return all_valid
+    problems.extend(long_paths + missing_files)
+    return problems, "\n".join(lines)
 
 
-if __name__ == "__main__":
-    sounds_dir = Path("mod/sounds")
-    xml_files = list(sounds_dir.glob("gfl_voice_lines_*.xml"))
+def plural(count, noun):
+    """ "1 clip", "2 clips" """
+    return f"{count} {noun}" if count == 1 else f"{count} {noun}s"
+
+
+def max_seconds(sound_id):
+    """Longest clip a Sound ID may play, in seconds"""
+    if sound_id in BARK_SOUND_IDS:
+        return BARK_MAX_SECONDS
+    if sound_id in EVENT_SOUND_IDS:
+        return EVENT_MAX_SECONDS
+    return DEFAULT_MAX_SECONDS
+
+
+def read_header(audio_file):
+    """Sample rate, channels and duration from a clip's header, or the error"""
+    import soundfile as sf
+
+    try:
+        return sf.info(str(audio_file))
+    except (sf.LibsndfileError, OSError) as e:
+        return e
+
+
+def scan_levels(audio_file):
+    """
+    Decode a whole clip block by block.
+
+    Returns: (peak in dBFS, number of clipped samples), or the error if the
+    clip can't be decoded
+    """
+    import numpy as np
+    import soundfile as sf
+
+    peak = 0.0
+    clipped = 0
+
+    try:
+        for block in sf.blocks(str(audio_file), blocksize=1 << 16, dtype="float32"):
+            magnitude = np.abs(block)
+            peak = max(peak, float(magnitude.max(initial=0.0)))
+            clipped += int(np.count_nonzero(magnitude >= CLIP_LEVEL))
+    except (sf.LibsndfileError, OSError) as e:
+        return e
+
+    peak_db = 20 * np.log10(peak) if peak > 0 else -np.inf
+    return peak_db, clipped
+
+
+def check_audio(graph, xml_file, existing, executor):
+    """
+    Check every clip an XML file's packs use against the audio policy,
+    reading only WAV headers, then fully scan the clips that break it.
+
+    A clip used by several Sound IDs is held to the strictest length limit
+    among them. Wrong sample rates, unreadable files and clipping are errors;
+    other policy breaks are warnings.
+
+    Parameters:
+     - existing: Voice file paths on disk, from list_voice_files
+     - executor: Pool the header reads and scans run on
+
+    Returns: (list of diagnostics, report text)
+    """
+    # path -> (length limit, Sound ID and <Path> element it comes from)
+    uses = {}
+    for pack in graph.definitions(kind="pack", file=xml_file):
+        for sound in pack.element.iter("Sound"):
+            limit = max_seconds(sound.get("ID"))
+            for element in sound.iter("Path"):
+                path = element.get("name", "")
+                if path in existing and (path not in uses or limit < uses[path][0]):
+                    uses[path] = (limit, sound.get("ID"), element)
+
+    paths = sorted(uses)
+    headers = executor.map(read_header, [graph.asset_file(path) for path in paths])
+
+    problems = {}
+    for path, info in zip(paths, headers):
+        limit, sound_id, element = uses[path]
+
+        if isinstance(info, Exception):
+            problems[path] = [("error", "audio-unreadable", str(info))]
+            continue
+
+        found = []
+        if info.samplerate not in VOICE_SAMPLE_RATES:
+            rates = ", ".join(str(rate) for rate in VOICE_SAMPLE_RATES)
+            found.append(
+                ("error", "audio-format", f"{info.samplerate} Hz, expected {rates}")
+            )
+        if info.channels != CHANNELS:
+            found.append(
+                (
+                    "warning",
+                    "audio-format",
+                    f"{info.channels} channels, expected {CHANNELS}",
+                )
+            )
+        if info.duration > limit:
+            found.append(
+                (
+                    "warning",
+                    "audio-duration",
+                    f"{info.duration:.1f} s, {sound_id} allows {limit:g} s",
+                )
+            )
+        if found:
+            problems[path] = found
+
+    # Only clips that broke the policy are worth decoding in full
+    scanned = [
+        path for path, found in problems.items() if found[0][1] != "audio-unreadable"
+    ]
+    levels = executor.map(scan_levels, [graph.asset_file(path) for path in scanned])
+    for path, level in zip(scanned, levels):
+        if isinstance(level, Exception):
+            problems[path].append(("error", "audio-unreadable", str(level)))
+            continue
+
+        peak_db, clipped = level
+        if clipped:
+            problems[path].append(
+                (
+                    "error",
+                    "audio-clipping",
+                    f"{clipped} clipped samples, peak {peak_db:.1f} dBFS",
+                )
+            )
+
+    diagnostics = [
+        diagnostic(graph, xml_file, uses[path][2], code, f"{path}: {detail}", severity)
+        for path in paths
+        for severity, code, detail in problems.get(path, ())
+    ]
+
+    lines = []
+    if diagnostics:
+        errors = any(problem["severity"] == "error" for problem in diagnostics)
+        lines.append(
+            f"\n  {'❌' if errors else '⚠'} Found"
+            f" {plural(len(diagnostics), 'audio problem')}"
+            f" in {plural(len(problems), 'clip')}:"
+        )
+        for problem in diagnostics:
+            marker = "❌" if problem["severity"] == "error" else "⚠"
+            lines.append(f"    {marker} {problem['message']}")
+            lines.append(f"      at {format_location(problem)}")
+    else:
+        lines.append(
+            f"  ✓ All {len(paths)} referenced voice files pass the audio checks"
+        )
+
+    return diagnostics, "\n".join(lines)
+
+
+def parse_error_diagnostic(graph, xml_file, error):
+    """Describe a voice line XML file the mod graph couldn't parse"""
+    return {
+        "file": (graph.mod_dir / xml_file).as_posix(),
+        "line": getattr(error, "lineno", 1),
+        "column": getattr(error, "offset", 0) + 1,
+        "severity": "error",
+        "code": "parse-error",
+        "message": str(error),
+    }
+
+
+def is_voice_xml(xml_file):
+    """Whether a path relative to mod/ is a voice line XML file"""
+    return Path(xml_file).match("sounds/gfl_voice_lines_*.xml")
+
+
+def listing_hash(directory):
+    """
+    SHA-256 of a directory's sorted entry names, sizes and modification
+    times, or None if it's missing
+    """
+    try:
+        with os.scandir(directory) as entries:
+            listing = sorted(
+                f"{entry.name}\t{entry.stat().st_size}\t{entry.stat().st_mtime_ns}"
+                for entry in entries
+            )
+    except FileNotFoundError:
+        return None
+    return hashlib.sha256("\n".join(listing).encode("utf-8")).hexdigest()
+
+
+def referenced_dirs(graph, xml_file):
+    """Voice folders ("data/sounds/voice/Character") an XML file's packs use"""
+    return sorted(
+        {
+            path.rsplit("/", 1)[0]
+            for pack in graph.definitions(kind="pack", file=xml_file)
+            for element in pack.element.iter("Path")
+            if (path := element.get("name", "")).startswith(VOICE_PREFIX)
+        }
+    )
+
+
+def load_cache(cache_file):
+    """
+    Load the validation cache, or an empty one if it's missing or was written
+    by a different version of this script.
+
+    The cache maps each XML file (relative to mod/) to the content hash and
+    voice folder listings it was validated against, and the resulting
+    diagnostics and report.
+    """
+    empty = {"validator": file_hash(__file__), "files": {}}
+    cache = load_json(cache_file, empty)
+
+    if cache.get("validator") != empty["validator"]:
+        return empty
+    return cache
+
+
+def is_up_to_date(mod_dir, xml_file, entry):
+    """Whether an XML file and the voice folders it uses match a cache entry"""
+    if entry is None or entry["hash"] != file_hash(mod_dir / xml_file):
+        return False
+
+    return all(
+        listing_hash(mod_dir / folder.removeprefix("data/")) == digest
+        for folder, digest in entry["dirs"].items()
+    )
+
+
+def changed_paths():
+    """
+    Paths git sees as changed since HEAD (staged or not) or untracked,
+    relative to the current directory.
+    """
+    paths = set()
+
+    for command in (
+        ["git", "diff", "--name-only", "--relative", "HEAD"],
+        ["git", "ls-files", "--others", "--exclude-standard"],
+    ):
+        result = subprocess.run(command, capture_output=True, text=True, check=True)
+        paths.update(result.stdout.splitlines())
+
+    return paths
+
+
+def affected_by(mod_dir, xml_files, paths, cache):
+    """
+    Pick the XML files a set of changed paths can affect: the files
+    themselves, and files whose voice folders gained, lost or changed a clip.
+    Files with no cache entry are always included.
+    """
+    changed_files = set()
+    changed_dirs = set()
+
+    for path in paths:
+        path = Path(path)
+        if not path.is_relative_to(mod_dir):
+            continue
+        rel_path = path.relative_to(mod_dir).as_posix()
+        changed_files.add(rel_path)
+        changed_dirs.add(f"data/{rel_path}".rsplit("/", 1)[0])
+
+    return [
+        xml_file
+        for xml_file in xml_files
+        if xml_file in changed_files
+        or xml_file not in cache["files"]
+        or changed_dirs.intersection(cache["files"][xml_file]["dirs"])
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate voice line XML and the voice files it references"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json"],
+        default="text",
+        help="text: a report per pack; json: a list of problems, each with"
+        " file, line, column, code and message (default: text)",
+    )
+    parser.add_argument(
+        "--changed-only",
+        action="store_true",
+        help="Only validate XML files affected by changes git reports (staged,"
+        " unstaged or untracked), e.g. from a pre-commit hook",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Validate everything again instead of reusing {CACHE_FILE}",
+    )
+    args = parser.parse_args()
+    as_json = args.format == "json"
+
+    xml_files = sorted(
+        xml_path.relative_to(MOD_DIR).as_posix()
+        for xml_path in (MOD_DIR / "sounds").glob("gfl_voice_lines_*.xml")
+    )
 
     if not xml_files:
         print("No voice line XML files found in mod/sounds/")
-        sys.exit(1)
+        return 1
 
-    print(f"Found {len(xml_files)} voice line XML files to validate")
+    cache = load_cache(CACHE_FILE)
+    if args.no_cache:
+        cache["files"] = {}
 
-    all_valid = True
-    for xml_file in sorted(xml_files):
-        if not validate_voice_xml(str(xml_file)):
-            all_valid = False
+    if args.changed_only:
+        try:
+            paths = changed_paths()
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Error: couldn't list changed files with git: {e}")
+            return 1
 
-    if all_valid:
-        print("\n✓ All voice files validated successfully!")
-        sys.exit(0)
-    else:
+        xml_files = affected_by(MOD_DIR, xml_files, paths, cache)
+        if not xml_files:
+            if as_json:
+                print("[]")
+            else:
+                print("✓ No changes affect the voice line XML files")
+            return 0
+
+    stale = [
+        xml_file
+        for xml_file in xml_files
+        if not is_up_to_date(MOD_DIR, xml_file, cache["files"].get(xml_file))
+    ]
+
+    # Hash before parsing, so an edit made mid-run leaves the entry stale
+    hashes = {xml_file: file_hash(MOD_DIR / xml_file) for xml_file in stale}
+    graph = ModGraph(MOD_DIR, stale)
+    problems = [
+        parse_error_diagnostic(graph, xml_file, error)
+        for xml_file, error in graph.errors
+    ]
+
+    if not as_json:
+        for problem in problems:
+            print(
+                f"❌ Could not parse {format_location(problem)}: {problem['message']}"
+            )
+        print(
+            f"Found {len(xml_files)} voice line XML files to validate"
+            + (
+                f" ({len(xml_files) - len(stale)} unchanged)"
+                if stale != xml_files
+                else ""
+            )
+        )
+
+    existing = list_voice_files(graph.asset_file(VOICE_PREFIX)) if stale else set()
+
+    def validate(xml_file):
+        if xml_file not in hashes:
+            entry = cache["files"][xml_file]
+            return entry["problems"], entry["report"]
+        if xml_file not in graph.files:
+            # Already reported as a parse error
+            return [], ""
+
+        file_problems, report = validate_voice_xml(graph, xml_file, existing)
+        audio_problems, audio_report = check_audio(
+            graph, xml_file, existing, audio_executor
+        )
+        file_problems += audio_problems
+        report += "\n" + audio_report
+
+        cache["files"][xml_file] = {
+            "hash": hashes[xml_file],
+            "dirs": {
+                folder: listing_hash(graph.asset_file(folder))
+                for folder in referenced_dirs(graph, xml_file)
+            },
+            "problems": file_problems,
+            "report": report,
+        }
+        return file_problems, report
+
+    # Each file is checked against the same listing, so they can run in any
+    # order; map() hands the reports back in file order
+    with ThreadPoolExecutor() as executor, ThreadPoolExecutor() as audio_executor:
+        for file_problems, report in executor.map(validate, xml_files):
+            problems.extend(file_problems)
+            if report and not as_json:
+                print(report)
+
+    if stale:
+        save_json(CACHE_FILE, cache)
+
+    errors = [problem for problem in problems if problem["severity"] == "error"]
+    warnings = len(problems) - len(errors)
+
+    if as_json:
+        problems = [
+            {field: problem[field] for field in DIAGNOSTIC_FIELDS}
+            for problem in problems
+        ]
+        print(json.dumps(problems, indent=2, ensure_ascii=False))
+    elif errors:
         print("\n❌ Some voice files are invalid!")
-        sys.exit(1)
+    elif warnings:
+        print(
+            "\n✓ All voice files validated successfully,"
+            f" with {plural(warnings, 'warning')}"
+        )
+    else:
+        print("\n✓ All voice files validated successfully!")
+
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())